@@ -1,23 +1,58 @@
 """
 app_il.py — TASE Israel Stock Scanner (Murphy Method)
+
+Startup: only streamlit / pandas / numpy, the stock universe and scan_config_il are imported up
+front. The header and sidebar render first; yfinance-backed modules, plotly, the
+backtester, VIX analysis and news load on first use of their step / view
+(_lazy), and the sidebar's "⏱ Startup timing" shows what each import cost.
 """
 
+import time
+_T0 = time.perf_counter()
+
+import importlib
+import sys
 import streamlit as st
 import pandas as pd
 import numpy as np
-import yfinance as yf
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
 import calendar
 import warnings
 warnings.filterwarnings('ignore')
 
-from screener_il import calculate_indicators_il, debug_ticker_il
-from backtester_il import run_backtest_il
-from news_fetcher_il import fetch_news_il, fetch_market_news_il
 from stock_universe_il import STOCK_UNIVERSE_IL, SECTOR_MAP, get_by_sector
-from vix_analyzer import run_vix_spike_analysis, get_vix_spike_windows
+from scan_config_il import SCAN_WORKERS
+
+_BASE_IMPORT_S = time.perf_counter() - _T0
+
+# ══════════════════════════════════════════════
+#  LAZY IMPORTS + STARTUP TIMING
+# ══════════════════════════════════════════════
+@st.cache_resource
+def _import_log() -> dict:
+    """module → seconds its first import took in this server process."""
+    return {"streamlit/pandas/numpy + universe": round(_BASE_IMPORT_S, 3)}
+
+
+def _lazy(name: str):
+    """Import `name` on first use and record the cost."""
+    mod = sys.modules.get(name)
+    if mod is None:
+        t0  = time.perf_counter()
+        mod = importlib.import_module(name)
+        _import_log().setdefault(name, round(time.perf_counter() - t0, 3))
+    return mod
+
+
+def render_startup_timing(stages: dict):
+    with st.sidebar.expander("⏱ Startup timing"):
+        st.caption("First import per server process")
+        st.dataframe(pd.DataFrame(list(_import_log().items()), columns=["Import", "Seconds"]),
+                     use_container_width=True, hide_index=True)
+        st.caption("This run")
+        st.dataframe(pd.DataFrame(list(stages.items()), columns=["Stage", "Seconds"]),
+                     use_container_width=True, hide_index=True)
+
 
 st.set_page_config(
     page_title="📊 TASE Stock Scanner — Murphy",
@@ -104,24 +139,14 @@ def _is_tase_open() -> bool:
 # ══════════════════════════════════════════════
 #  MARKET DATA
 # ══════════════════════════════════════════════
-@st.cache_data(ttl=180)
+@st.cache_resource
+def _market_snapshot():
+    """One background-refreshed snapshot per server process, shared by all sessions."""
+    return _lazy("market_snapshot_il").MarketSnapshot().start()
+
+
 def fetch_tase_market_data():
-    symbols = {"^TA35.TA":"TA-35", "^TA125.TA":"TA-125", "^VIX":"VIX (US)", "USDILS=X":"USD/ILS"}
-    result = {}
-    for sym, label in symbols.items():
-        try:
-            hist = yf.Ticker(sym).history(period="2d", interval="1d")
-            if len(hist) >= 2:
-                prev = float(hist['Close'].iloc[-2]); curr = float(hist['Close'].iloc[-1])
-                chg  = (curr - prev) / prev * 100
-            elif len(hist) == 1:
-                curr = float(hist['Close'].iloc[-1]); chg = 0
-            else:
-                curr = chg = 0
-            result[label] = {"value": curr, "change_pct": chg}
-        except Exception:
-            result[label] = {"value": 0, "change_pct": 0}
-    return result
+    return _market_snapshot().get()
 
 
 def render_market_bar():
@@ -204,6 +229,7 @@ def render_sidebar():
         st.markdown("---")
         fresh_only = st.checkbox("🟢 Fresh Signals (≤5 days)", value=False)
         max_stocks = st.slider("Max stocks to scan", 20, len(STOCK_UNIVERSE_IL), len(STOCK_UNIVERSE_IL))
+        scan_workers = st.slider("Scan workers (threads)", 1, 16, SCAN_WORKERS)
         st.markdown("---")
         run_scan = st.button("🔍 STEP 1 — RUN SCAN", use_container_width=True)
         st.caption("Live data from yfinance")
@@ -220,7 +246,7 @@ def render_sidebar():
             require_above_ma=req_ma, require_above_50=req50, require_above_20=req20,
             require_uptrend_52w=req_uptrend, bb_period=int(bb_period), bb_std=bb_std,
             show_fresh_only=fresh_only, selected_sector=selected_sector,
-            max_stocks=max_stocks, run_scan=run_scan, run_backtest=run_bt,
+            max_stocks=max_stocks, scan_workers=scan_workers, run_scan=run_scan, run_backtest=run_bt,
             run_debug=run_debug, debug_ticker=debug_input,
         )
 
@@ -346,13 +372,14 @@ def render_stock_card_il(stock, bt_summary=None, rsi_period=14):
 # ══════════════════════════════════════════════
 #  CHART
 # ══════════════════════════════════════════════
-def render_chart_il(ticker, params):
+def render_chart_il(ticker, params, session=None):
+    go            = _lazy("plotly.graph_objects")
+    make_subplots = _lazy("plotly.subplots").make_subplots
     try:
-        df = yf.download(ticker, period="6mo", interval="1d", progress=False)
+        df = (session.get(ticker, period="6mo") if session is not None
+              else _lazy("data_store_il").get_ohlcv(ticker, period="6mo")).copy()
         if df.empty or len(df) < 40:
             st.warning(f"Not enough data for {ticker}"); return
-        if isinstance(df.columns, pd.MultiIndex):
-            df.columns = df.columns.get_level_values(0)
         close = df['Close'].squeeze()
         df['MA20']  = close.rolling(20).mean()
         df['MA50']  = close.rolling(50).mean()
@@ -396,6 +423,60 @@ def render_chart_il(ticker, params):
         st.error(f"Chart error: {e}")
 
 
+def render_beta_chart_il(ticker, session=None):
+    """Rolling 60 / 120-day beta and correlation vs TA-125 (cross_section_il)."""
+    go = _lazy("plotly.graph_objects")
+    make_subplots = _lazy("plotly.subplots").make_subplots
+    try:
+        df = (session.get(ticker, period="2y") if session is not None
+              else _lazy("data_store_il").get_ohlcv(ticker, period="2y"))
+        roll = _lazy("cross_section_il").rolling_beta_series(df['Close']) if not df.empty else None
+        if roll is None or roll.empty or roll.isna().all().all():
+            st.info(f"Not enough overlap with TA-125 for a rolling beta of {ticker}"); return
+        roll = roll.iloc[-252:]
+        fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.55,0.45], vertical_spacing=0.06)
+        for col,clr,row in [('beta_60','#00e5c0',1),('beta_120','#60a5fa',1),
+                            ('corr_60','#fbbf24',2),('corr_120','#a78bfa',2)]:
+            fig.add_trace(go.Scatter(x=roll.index, y=roll[col], name=col.replace('_',' ')+'d',
+                line=dict(color=clr, width=1.5)), row=row, col=1)
+        fig.add_hline(y=1, line_dash="dot", line_color="#3d4f6b", row=1, col=1)
+        fig.add_hline(y=0, line_dash="dot", line_color="#3d4f6b", row=2, col=1)
+        ts = ticker.replace('.TA','')
+        fig.update_layout(plot_bgcolor='#0f1927', paper_bgcolor='#070b14',
+            font=dict(color='#dde4f0', family='IBM Plex Mono'), height=380,
+            margin=dict(l=10,r=10,t=35,b=10),
+            title=dict(text=f"{ts} — Rolling Beta / Correlation vs TA-125", font=dict(color='#00e5c0', size=14)),
+            legend=dict(bgcolor='rgba(0,0,0,0)', font=dict(size=9)))
+        fig.update_yaxes(title_text="Beta", row=1, col=1); fig.update_yaxes(title_text="Corr", range=[-1,1], row=2, col=1)
+        fig.update_xaxes(gridcolor='#172035'); fig.update_yaxes(gridcolor='#172035')
+        st.plotly_chart(fig, use_container_width=True)
+    except Exception as e:
+        st.error(f"Beta chart error: {e}")
+
+
+def render_correlation_matrix_il(tickers, session=None):
+    """Universe correlation heatmap (1y daily returns, pairwise-complete) for risk review."""
+    go = _lazy("plotly.graph_objects")
+    corr = _lazy("cross_section_il").universe_correlation(tickers, session)
+    if corr.empty or len(corr) < 2:
+        st.info("Not enough stocks with overlapping history."); return
+    labels = [t.replace('.TA','') for t in corr.index]
+    fig = go.Figure(go.Heatmap(
+        z=corr.to_numpy(), x=labels, y=labels, zmin=-1, zmax=1,
+        colorscale=[[0, '#f87171'], [0.5, '#0f1927'], [1, '#00e5c0']],
+        colorbar=dict(title="ρ"), hovertemplate="%{x} · %{y}<br>ρ %{z:.2f}<extra></extra>"))
+    fig.update_layout(plot_bgcolor='#0f1927', paper_bgcolor='#070b14',
+        font=dict(color='#dde4f0', family='IBM Plex Mono'), height=max(420, 14*len(labels)),
+        margin=dict(l=10,r=10,t=35,b=10),
+        title=dict(text=f"Correlation matrix — {len(labels)} stocks, 1y daily returns",
+                   font=dict(color='#00e5c0', size=14)),
+        yaxis=dict(autorange="reversed"))
+    st.plotly_chart(fig, use_container_width=True)
+    off = corr.where(~np.eye(len(corr), dtype=bool)).stack()
+    if len(off):
+        st.caption(f"Avg pairwise ρ {off.mean():.2f} · pairs ρ > 0.7: {int((off > 0.7).sum() // 2)}")
+
+
 # ══════════════════════════════════════════════
 #  BACKTEST RESULTS
 # ══════════════════════════════════════════════
@@ -437,12 +518,15 @@ def render_backtest_panel_il(bt_data):
 #  NEWS
 # ══════════════════════════════════════════════
 def render_market_news():
+    news = _lazy("news_fetcher_il")
     st.markdown("### 📰 Market News")
     st.caption("Headlines from major TASE indices via yfinance")
     if st.button("🔄 Refresh News", key="refresh_news"):
-        st.cache_data.clear()
-    with st.spinner("Loading news..."):
-        headlines = fetch_market_news_il()
+        news.clear_news_cache()
+    headlines = news.cached_market_news_il()
+    news.prefetch_news_il([])                    # no-op for sources cached or already in flight
+    if headlines is None:
+        st.info("Loading market news in the background — press 🔄 Refresh News in a few seconds."); return
     if not headlines:
         st.info("No news available right now."); return
     for h in headlines:
@@ -455,20 +539,50 @@ def render_market_news():
 # ══════════════════════════════════════════════
 #  MAIN
 # ══════════════════════════════════════════════
+def _selected_universe(params) -> list:
+    sector = params.get('selected_sector','All')
+    if sector != 'All':
+        return get_by_sector(sector) or STOCK_UNIVERSE_IL
+    return STOCK_UNIVERSE_IL[:params['max_stocks']]
+
+
+def _refilter(params, universe) -> list:
+    """Sidebar filters + score over the cached metrics table → scan_results_il."""
+    mt      = st.session_state.metrics_il
+    allowed = set(universe)
+    rows    = [i for i, m in enumerate(mt['metrics']) if m['ticker'] in allowed]
+    results = _lazy("screener_il").filter_and_score_il(
+        [mt['metrics'][i] for i in rows], params,
+        mt['frame'].iloc[rows].reset_index(drop=True))
+    _lazy("metadata_cache_il").apply_metadata(results)
+    results.sort(key=lambda x: (-x.get('score',0), x.get('ticker','')))
+    st.session_state.scan_results_il = results
+    return results
+
+
 def main():
+    stages, t0 = {}, time.perf_counter()
+
+    def mark(name):
+        nonlocal t0
+        stages[name] = round(time.perf_counter() - t0, 3)
+        t0 = time.perf_counter()
+
     st.markdown('<div class="main-header">🇮🇱 TASE STOCK SCANNER</div>', unsafe_allow_html=True)
     st.markdown('<div class="sub-header">Live Screener · Murphy Method · Tel Aviv Stock Exchange · Signal Backtester</div>',
                 unsafe_allow_html=True)
-
-    vix    = render_market_bar()
+    mark("header")
     params = render_sidebar()
+    mark("sidebar")
+    vix    = render_market_bar()
+    mark("market bar")
 
     if vix >= 28:
         st.error("🚫 **VIX above 28 — Very high fear. Do not enter new positions today.**")
     elif vix >= 20:
         st.warning("⚠️ **VIX 20–28 — Caution. Consider only high-score stocks (≥7).**")
 
-    for k in ['scan_results_il','backtest_results_il']:
+    for k in ['scan_results_il','backtest_results_il','data_session_il','scan_stats_il','metrics_il']:
         if k not in st.session_state: st.session_state[k] = None
 
     # ── DEBUG
@@ -476,30 +590,38 @@ def main():
         t = params['debug_ticker']
         if not t.endswith('.TA'): t += '.TA'
         with st.spinner(f"Debugging {t}..."):
-            msg = debug_ticker_il(t, params)
+            msg = _lazy("screener_il").debug_ticker_il(t, params)
         st.info(msg)
 
-    # ── STEP 1: SCAN
+    # ── STEP 1: SCAN — unfiltered metrics table (only indicator params matter)
+    universe = _selected_universe(params)
     if params['run_scan']:
         sector = params.get('selected_sector','All')
-        if sector != 'All':
-            universe = get_by_sector(sector) or STOCK_UNIVERSE_IL
-        else:
-            universe = STOCK_UNIVERSE_IL[:params['max_stocks']]
         tag = f"  (Sector: {sector})" if sector != 'All' else ''
         st.info(f"🔍 Scanning {len(universe)} stocks{tag}...")
-        pb=st.progress(0); st_txt=st.empty(); results=[]
-        for i,ticker in enumerate(universe):
-            pb.progress((i+1)/len(universe))
-            st_txt.caption(f"Scanning {ticker.replace('.TA','')}… ({i+1}/{len(universe)}) — found: {len(results)}")
-            try:
-                r = calculate_indicators_il(ticker, params)
-                if r and r.get('passes_filter'): results.append(r)
-            except Exception: pass
-        results.sort(key=lambda x: (-x.get('score',0), x.get('ticker','')))
-        st.session_state.scan_results_il=results; st.session_state.backtest_results_il=None
+        pb=st.progress(0); st_txt=st.empty()
+        session  = _lazy("data_store_il").DataSession()
+        st.session_state.data_session_il = session
+        metrics, scan_stats = _lazy("scan_engine_il").build_metrics_table_il(
+            universe, params, session, params['scan_workers'], pb, st_txt)
+        screener = _lazy("screener_il")
+        st.session_state.metrics_il = {
+            "key":     tuple(params[k] for k in screener.INDICATOR_PARAMS),
+            "metrics": metrics,
+            "frame":   screener.metrics_frame(metrics),
+        }
+        st.session_state.scan_stats_il = scan_stats
+        st.session_state.backtest_results_il = None
+        st_txt.caption("Loading company names…")
+        passed = _refilter(params, universe)
+        _lazy("metadata_cache_il").prefetch_metadata([r['ticker'] for r in passed])
+        _lazy("news_fetcher_il").prefetch_news_il([r['ticker'] for r in passed])
         pb.empty(); st_txt.empty()
-        if not results:
+
+    # ── FILTER + SCORE — every rerun, on the cached table (milliseconds)
+    if st.session_state.metrics_il is not None:
+        results = _refilter(params, universe)
+        if params['run_scan'] and not results:
             st.warning("⚠️ 0 stocks passed filters. Try: RSI Max=65, uncheck MA, lower Min Beta.")
 
     # ── STEP 2: BACKTEST
@@ -511,7 +633,8 @@ def main():
             tickers=[r['ticker'] for r in scan_res]
             st.info(f"📊 Backtesting {len(tickers)} stocks — 1 year history…")
             pb2=st.progress(0); st2=st.empty()
-            bt=run_backtest_il(tickers, params, pb2, st2)
+            bt=_lazy("backtester_il").run_backtest_il(tickers, params, pb2, st2,
+                                                     st.session_state.data_session_il)
             st.session_state.backtest_results_il=bt
             pb2.empty(); st2.empty()
 
@@ -541,6 +664,14 @@ def main():
             filtered=[r for r in results if r.get('score',0)>=min_score]
             if fresh_only: filtered=[r for r in filtered if r.get('signal_fresh',False)]
             st.caption(f"🔍 Passed screener: {len(results)} stocks | Showing: {len(filtered)}")
+            ss=st.session_state.scan_stats_il
+            if ss:
+                st.caption(f"Universe {ss['universe']} → prefilter rejected {ss['prefilter_rejected']} "
+                           f"(price/volume, no history download) → metrics computed for "
+                           f"{ss['metrics']} of {ss['history_scanned']} → passed current filters {len(results)}")
+            mt=st.session_state.metrics_il
+            if mt and mt['key']!=tuple(params[k] for k in _lazy("screener_il").INDICATOR_PARAMS):
+                st.caption("ℹ️ RSI / Bollinger settings changed — press STEP 1 to recompute the indicators.")
             if sort_by=="RSI (lowest)":
                 filtered.sort(key=lambda x: x.get('rsi',100))
             elif sort_by=="Win Rate (backtest)" and bt_data:
@@ -548,28 +679,40 @@ def main():
                 filtered.sort(key=lambda x: ps.get(x['ticker'],{}).get('win_rate',0),reverse=True)
 
             st.markdown(f"### 🎯 {len(filtered)} Opportunities")
-            t1,t2,t3,t4,t5=st.tabs(["📋 Stocks","📈 Charts","📰 News","📊 Backtest","😨 VIX Spike Analysis"])
+            # a view selector instead of st.tabs: only the chosen view runs (and imports)
+            view=st.radio("View",["📋 Stocks","📈 Charts","📰 News","📊 Backtest","😨 VIX Spike Analysis"],
+                          horizontal=True, label_visibility="collapsed", key="view_il")
 
-            with t1:
+            if view=="📋 Stocks":
                 if not filtered: st.info("No stocks to display with current filters.")
                 for stock in filtered:
                     bts=bt_data.get('per_stock',{}).get(stock['ticker']) if bt_data else None
                     render_stock_card_il(stock, bts, rsi_period=params['rsi_period'])
 
-            with t2:
+            elif view=="📈 Charts":
                 if filtered:
                     opts=[r['ticker'].replace('.TA','')+" — "+r.get('name','')[:30] for r in filtered[:30]]
                     idx=st.selectbox("Select stock for chart",range(len(opts)),format_func=lambda i:opts[i])
-                    render_chart_il(filtered[idx]['ticker'], params)
+                    render_chart_il(filtered[idx]['ticker'], params, st.session_state.data_session_il)
+                    render_beta_chart_il(filtered[idx]['ticker'], st.session_state.data_session_il)
+                    with st.expander("🧮 Correlation matrix (risk review)"):
+                        scope=st.radio("Stocks",["Opportunities","All scanned"],horizontal=True,key="corr_scope_il")
+                        pool=(filtered if scope=="Opportunities" else (mt or {}).get('metrics',filtered))
+                        if st.button("Compute correlation matrix",key="corr_btn_il"):
+                            render_correlation_matrix_il([r['ticker'] for r in pool],
+                                                         st.session_state.data_session_il)
                 else: st.info("No stocks to display.")
 
-            with t3:
+            elif view=="📰 News":
                 if filtered:
+                    news_mod=_lazy("news_fetcher_il")
                     opts=[r['ticker'].replace('.TA','')+" — "+r.get('name','')[:25] for r in filtered[:30]]
                     si=st.selectbox("News for",range(len(opts)),format_func=lambda i:opts[i],key="ns_il")
-                    with st.spinner("Loading news..."):
-                        news=fetch_news_il(filtered[si]['ticker'])
-                    if news:
+                    news=news_mod.cached_news_il(filtered[si]['ticker'])
+                    if news is None:
+                        news_mod.prefetch_news_il([filtered[si]['ticker']], include_market=False)
+                        st.info("Fetching news in the background — it will show on the next refresh.")
+                    elif news:
                         for item in news:
                             st.markdown(f'<div class="news-item"><a href="{item.get("url","#")}" '
                                         f'target="_blank" class="news-title">{item.get("title","")}</a>'
@@ -579,12 +722,12 @@ def main():
                     st.markdown("---"); render_market_news()
                 else: render_market_news()
 
-            with t4:
+            elif view=="📊 Backtest":
                 if bt_data: render_backtest_panel_il(bt_data)
                 else: st.info("Press **STEP 2 — BACKTEST** in the sidebar after scanning.")
 
-            with t5:
-                render_vix_spike_tab(universe if "universe" in dir() else STOCK_UNIVERSE_IL)
+            else:
+                render_vix_spike_tab(universe, st.session_state.data_session_il)
     else:
         st.markdown(f"""
         <div style="text-align:center;padding:5rem 2rem;color:#3d4f6b;">
@@ -605,15 +748,15 @@ def main():
               <div style="font-size:0.72rem;color:#3d4f6b;">Benchmark Index</div></div>
           </div>
         </div>""", unsafe_allow_html=True)
+    mark("body")
+    render_startup_timing(stages)
 
 
-if __name__ == "__main__":
-    main()
-
 # ══════════════════════════════════════════════
 #  VIX SPIKE BEHAVIOR TAB  (injected as render fn)
 # ══════════════════════════════════════════════
-def render_vix_spike_tab(universe: list):
+def render_vix_spike_tab(universe: list, session=None):
+    vixa = _lazy("vix_analyzer")
     st.markdown("### 😨 VIX Spike Behavior Analysis")
     st.caption(
         "When the VIX fear index spiked above the threshold in the past, "
@@ -636,7 +779,7 @@ def render_vix_spike_tab(universe: list):
 
     # ── Preview: how many spikes exist ───────────────────────
     with st.spinner("Checking historical VIX spikes..."):
-        preview_windows = get_vix_spike_windows(threshold, lookback)
+        preview_windows = vixa.get_vix_spike_windows(threshold, lookback)
 
     if not preview_windows:
         st.warning(f"No VIX spikes above {threshold} found in the last {lookback//365} year(s). Try lowering the threshold.")
@@ -665,17 +808,31 @@ def render_vix_spike_tab(universe: list):
 
     st.markdown("---")
 
+    # ── Threshold surface (all thresholds at once) ───────────
+    with st.expander("📈 Threshold sensitivity — every threshold 18–50 at once"):
+        if st.button("Build threshold × stock surface", use_container_width=True, key="vix_surface_run"):
+            with st.spinner(f"Measuring {len(universe)} stocks across all thresholds…"):
+                pb  = st.progress(0)
+                txt = st.empty()
+                st.session_state['vix_surface'] = vixa.run_vix_threshold_surface(
+                    universe, lookback, progress_bar=pb, status_text=txt, session=session)
+                pb.empty(); txt.empty()
+        surface = st.session_state.get('vix_surface')
+        if surface:
+            _render_vix_surface(surface, min_events)
+
     # ── Run analysis ─────────────────────────────────────────
     if st.button("🔍 Analyze Stock Behavior During VIX Spikes", use_container_width=True, key="vix_run"):
         with st.spinner(f"Analyzing {len(universe)} stocks across {len(preview_windows)} spike events…"):
             pb  = st.progress(0)
             txt = st.empty()
-            data = run_vix_spike_analysis(
+            data = vixa.run_vix_spike_analysis(
                 tickers=universe,
                 threshold=threshold,
                 lookback_days=lookback,
                 progress_bar=pb,
                 status_text=txt,
+                session=session,
             )
             pb.empty(); txt.empty()
             st.session_state['vix_analysis'] = data
@@ -774,6 +931,36 @@ def render_vix_spike_tab(universe: list):
                     st.dataframe(pd.DataFrame(ev_rows), use_container_width=True, hide_index=True)
 
 
+def _render_vix_surface(surface: dict, min_events: int, n_each: int = 10):
+    """Heatmap of avg spike return (threshold × stock) for the best/worst stocks + ranking."""
+    if surface.get('error'):
+        st.error(surface['error']); return
+    go     = _lazy("plotly.graph_objects")
+    ranked = _lazy("vix_analyzer").rank_surface(surface, min_events)
+    if ranked.empty:
+        st.info("No stock has enough spike events at any threshold."); return
+
+    picks = list(dict.fromkeys(ranked['ticker'].head(n_each).tolist()
+                               + ranked['ticker'].tail(n_each).tolist()))
+    z     = surface['avg_return'][picks].where(surface['num_events'][picks] >= min_events)
+    fig = go.Figure(go.Heatmap(
+        z=z.to_numpy(), x=[t.replace('.TA', '') for t in picks], y=z.index,
+        colorscale=[[0, '#f87171'], [0.5, '#0f1927'], [1, '#00e5c0']], zmid=0,
+        colorbar=dict(title="avg %"),
+        hovertemplate="%{x} · VIX > %{y}<br>avg %{z:+.2f}%<extra></extra>"))
+    fig.update_layout(plot_bgcolor='#0f1927', paper_bgcolor='#070b14',
+        font=dict(color='#dde4f0', family='IBM Plex Mono'), height=520,
+        margin=dict(l=10,r=10,t=35,b=10),
+        title=dict(text=f"Avg return during spikes — top / bottom {n_each}",
+                   font=dict(color='#00e5c0', size=14)),
+        yaxis=dict(title="VIX threshold"))
+    st.plotly_chart(fig, use_container_width=True)
+
+    show = ranked.assign(ticker=ranked['ticker'].str.replace('.TA', '', regex=False))
+    show.columns = ["Ticker", "Avg Return (all thr.)", "% Rose", "Thresholds", "Return @ highest thr."]
+    st.dataframe(show, use_container_width=True, hide_index=True)
+
+
 def _render_vix_stock_row(r: dict, kind: str):
     """Render a single stock's VIX-spike behavior as a card."""
     pct_key  = 'pct_rose' if kind == 'riser' else 'pct_fell'
@@ -827,3 +1014,7 @@ def _render_vix_stock_row(r: dict, kind: str):
       </div>
     </div>
     """, unsafe_allow_html=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,18 +3,22 @@ backtester_il.py — Backtester for TASE Israeli stocks
 בק-טסטר לבורסת תל אביב
 
 לוגיקה:
-- מוריד שנה של נתונים יומיים לכל מניה
+- קורא שנה של נתונים יומיים לכל מניה מהמאגר המקומי (data_store_il)
 - מדמה כניסות ויציאות לפי שיטת מרפי
 - Buy:  RSI < rsi_max  AND  BB%B < 0.40  AND  מחיר > MA (ארוך)
 - Sell: RSI > 65  OR  BB%B > 0.80  OR  מחיר < MA50 * 0.95
 - מחשב: win_rate, avg_return, best/worst trade, avg_hold_days
+- simulate_trades: מכונת מצבים על מערכי NumPy (ימים × מניות) — כמה מניות במטריצה אחת
+- נתונים שכבר בזיכרון (price_data / DataSession של שלב 1) נבדקים במעבר וקטורי אחד, בלי רשת ובלי threads
 """
 
-import yfinance as yf
+import itertools
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+from data_store_il import get_ohlcv, as_index_ts
 
 
 def _rsi(s: pd.Series, period: int) -> pd.Series:
@@ -33,18 +37,135 @@ def _bb_pct(s: pd.Series, period: int, std_dev: float) -> pd.Series:
     return (s - lower) / (upper - lower)
 
 
-def _backtest_one_il(ticker: str, params: dict) -> dict:
+def _signals(close: pd.Series, params: dict) -> tuple:
+    """(rsi_ser, buy_sig, sell_sig) over the whole of `close` — כללי הכניסה/יציאה של מרפי."""
+    rsi_p  = params.get('rsi_period', 14)
+    rsi_th = params.get('rsi_max', 45)
+    bb_p   = params.get('bb_period', 20)
+    bb_std = params.get('bb_std', 2.0)
+
+    rsi_ser = _rsi(close, rsi_p)
+    bb_ser  = _bb_pct(close, bb_p, bb_std)
+    ma50    = close.rolling(50).mean()
+    ma_long = close.rolling(120).mean() if len(close) < 200 else close.rolling(200).mean()
+
+    buy_sig  = (rsi_ser < rsi_th) & (bb_ser < 0.40) & (close > ma_long) & (close > ma50 * 0.95)
+    sell_sig = (rsi_ser > 65)     | (bb_ser > 0.80) | (close < ma50 * 0.95)
+    return rsi_ser, buy_sig, sell_sig
+
+
+# ──────────────────────────────────────────────────────────────
+#  SIGNAL STATE MACHINE
+# ──────────────────────────────────────────────────────────────
+COOLDOWN_DAYS = 3
+
+
+def simulate_trades(close: np.ndarray, buy: np.ndarray, sell: np.ndarray,
+                    valid: np.ndarray = None, cooldown: int = COOLDOWN_DAYS) -> list:
+    """
+    Entry / exit / cooldown state machine over (days × tickers) arrays.
+    One step per day, vectorized across tickers:
+    - flat + buy signal            → enter at that day's close
+    - in trade + sell signal       → exit at that day's close
+    - losing exit (return ≤ 0)     → skip the next `cooldown` bars of that ticker
+    Days where `valid` is False (no bar for that ticker) are ignored entirely.
+    1-D inputs are treated as a single ticker.
+
+    Returns [(col, entry_row, exit_row)] in exit order; exit_row = -1 for trades
+    still open on the last day.
+    """
+    close, buy, sell = (np.asarray(a) for a in (close, buy, sell))
+    if close.ndim == 1:
+        close, buy, sell = close[:, None], buy[:, None], sell[:, None]
+    if valid is None:
+        valid = ~np.isnan(close)
+    elif valid.ndim == 1:
+        valid = valid[:, None]
+    buy, sell = buy.astype(bool), sell.astype(bool)
+
+    n_days, n_cols = close.shape
+    in_trade  = np.zeros(n_cols, dtype=bool)
+    entry_row = np.full(n_cols, -1)
+    cd_left   = np.zeros(n_cols, dtype=int)
+    trades    = []
+
+    for t in range(n_days):
+        v     = valid[t]
+        cool  = v & (cd_left > 0)
+        cd_left[cool] -= 1
+        act   = v & ~cool
+        enter = act & ~in_trade & buy[t]
+        exit_ = act & in_trade & sell[t]
+
+        if exit_.any():
+            cols   = np.flatnonzero(exit_)
+            bp     = close[entry_row[cols], cols]
+            pct    = (close[t, cols] - bp) / bp * 100
+            cd_left[cols[~(pct > 0)]] = cooldown
+            trades.extend((int(c), int(entry_row[c]), t) for c in cols)
+
+        in_trade = (in_trade | enter) & ~exit_
+        entry_row[enter] = t
+
+    trades.extend((int(c), int(entry_row[c]), -1) for c in np.flatnonzero(in_trade))
+    return trades
+
+
+def _trade_dict(ticker: str, index: pd.DatetimeIndex, close: np.ndarray,
+                rsi: np.ndarray, entry: int, exit_: int) -> dict:
+    """One trade-log row (exit_ = -1 → trade still open at the last bar)."""
+    buy_price = float(close[entry])
+    buy_rsi   = float(rsi[entry])
+    is_open   = exit_ < 0
+    out_row   = len(close) - 1 if is_open else exit_
+    price     = float(close[out_row])
+    pct       = (price - buy_price) / buy_price * 100
+    return {
+        "ticker":     ticker,
+        "buy_date":   index[entry].strftime('%Y-%m-%d'),
+        "sell_date":  "פתוח" if is_open else index[exit_].strftime('%Y-%m-%d'),
+        "buy_price":  round(buy_price, 2),
+        "sell_price": round(price, 2),
+        "return_%":   round(pct, 2),
+        "hold_days":  (index[out_row] - index[entry]).days,
+        "result":     "🔵 פתוח" if is_open else ("✅ רווח" if pct > 0 else "❌ הפסד"),
+        "rsi_at_buy": round(buy_rsi, 1) if buy_rsi else None,
+    }
+
+
+def _summarize(ticker: str, trades: list) -> dict:
+    if not trades:
+        return {}
+
+    closed   = [t for t in trades if t['sell_date'] != "פתוח"]
+    all_r    = [t['return_%'] for t in trades]
+    wins     = [t for t in closed if t['return_%'] > 0]
+    win_r    = len(wins) / len(closed) * 100 if closed else 0
+    holds    = [t['hold_days'] for t in trades]
+
+    return {
+        "ticker":        ticker,
+        "trades":        trades,
+        "total_trades":  len(trades),
+        "wins":          len(wins),
+        "losses":        len(closed) - len(wins),
+        "win_rate":      round(win_r, 1),
+        "avg_return":    round(float(np.mean(all_r)), 2),
+        "best_trade":    round(float(max(all_r)), 2),
+        "worst_trade":   round(float(min(all_r)), 2),
+        "avg_hold_days": round(float(np.mean(holds)), 1),
+    }
+
+
+def _backtest_one_il(ticker: str, params: dict, session=None) -> dict:
     try:
         end   = datetime.today()
         start = end - timedelta(days=420)
 
-        t  = yf.Ticker(ticker)
-        df = t.history(start=start, end=end, interval="1d",
-                       auto_adjust=True, actions=False)
+        df = (session.get(ticker, start=start) if session is not None
+              else get_ohlcv(ticker, start=start))
         if df is None or df.empty or 'Close' not in df.columns:
             return {}
-        if isinstance(df.columns, pd.MultiIndex):
-            df.columns = df.columns.get_level_values(0)
 
         close = df['Close']
         if isinstance(close, pd.DataFrame):
@@ -53,132 +174,107 @@ def _backtest_one_il(ticker: str, params: dict) -> dict:
         if len(close) < 60:
             return {}
 
-        rsi_p  = params.get('rsi_period', 14)
-        rsi_th = params.get('rsi_max', 45)
-        bb_p   = params.get('bb_period', 20)
-        bb_std = params.get('bb_std', 2.0)
-
-        rsi_ser = _rsi(close, rsi_p)
-        bb_ser  = _bb_pct(close, bb_p, bb_std)
-        ma50    = close.rolling(50).mean()
-        ma_long = close.rolling(120).mean() if len(close) < 200 else close.rolling(200).mean()
-
-        buy_sig  = (rsi_ser < rsi_th) & (bb_ser < 0.40) & (close > ma_long) & (close > ma50 * 0.95)
-        sell_sig = (rsi_ser > 65)     | (bb_ser > 0.80) | (close < ma50 * 0.95)
+        rsi_ser, buy_sig, sell_sig = _signals(close, params)
 
         # רק השנה האחרונה
-        cutoff  = pd.Timestamp(end - timedelta(days=365))
-        close_r = close[close.index >= cutoff]
-        buy_r   = buy_sig[buy_sig.index >= cutoff]
-        sell_r  = sell_sig[sell_sig.index >= cutoff]
-
-        trades        = []
-        in_trade      = False
-        buy_price     = None
-        buy_date      = None
-        buy_rsi       = None
-        cooldown_left = 0
-
-        for date in close_r.index:
-            if cooldown_left > 0:
-                cooldown_left -= 1
-                continue
+        cutoff = as_index_ts(end - timedelta(days=365), close.index)
+        first  = close.index.searchsorted(cutoff, side='left')
+        idx_r  = close.index[first:]
+        c_r    = close.to_numpy(dtype=float)[first:]
+        rsi_r  = rsi_ser.to_numpy(dtype=float)[first:]
 
-            price   = float(close_r.loc[date])
-            is_buy  = bool(buy_r.loc[date])  if date in buy_r.index  else False
-            is_sell = bool(sell_r.loc[date]) if date in sell_r.index else False
-
-            if not in_trade:
-                if is_buy:
-                    in_trade  = True
-                    buy_price = price
-                    buy_date  = date
-                    buy_rsi   = float(rsi_ser.loc[date]) if date in rsi_ser.index else None
-            else:
-                if is_sell:
-                    pct    = (price - buy_price) / buy_price * 100
-                    hold_d = (date - buy_date).days
-                    won    = pct > 0
-                    trades.append({
-                        "ticker":     ticker,
-                        "buy_date":   buy_date.strftime('%Y-%m-%d'),
-                        "sell_date":  date.strftime('%Y-%m-%d'),
-                        "buy_price":  round(float(buy_price), 2),
-                        "sell_price": round(float(price), 2),
-                        "return_%":   round(pct, 2),
-                        "hold_days":  hold_d,
-                        "result":     "✅ רווח" if won else "❌ הפסד",
-                        "rsi_at_buy": round(float(buy_rsi), 1) if buy_rsi else None,
-                    })
-                    in_trade = False
-                    buy_price = None
-                    if not won:
-                        cooldown_left = 3
-
-        # עסקה פתוחה בסוף התקופה
-        if in_trade and buy_price is not None:
-            last_price = float(close_r.iloc[-1])
-            pct = (last_price - buy_price) / buy_price * 100
-            hold_d = (close_r.index[-1] - buy_date).days
-            trades.append({
-                "ticker":     ticker,
-                "buy_date":   buy_date.strftime('%Y-%m-%d'),
-                "sell_date":  "פתוח",
-                "buy_price":  round(float(buy_price), 2),
-                "sell_price": round(float(last_price), 2),
-                "return_%":   round(pct, 2),
-                "hold_days":  hold_d,
-                "result":     "🔵 פתוח",
-                "rsi_at_buy": round(float(buy_rsi), 1) if buy_rsi else None,
-            })
-
-        if not trades:
-            return {}
-
-        closed   = [t for t in trades if t['sell_date'] != "פתוח"]
-        all_r    = [t['return_%'] for t in trades]
-        wins     = [t for t in closed if t['return_%'] > 0]
-        win_r    = len(wins) / len(closed) * 100 if closed else 0
-        holds    = [t['hold_days'] for t in trades]
-
-        return {
-            "ticker":        ticker,
-            "trades":        trades,
-            "total_trades":  len(trades),
-            "wins":          len(wins),
-            "losses":        len(closed) - len(wins),
-            "win_rate":      round(win_r, 1),
-            "avg_return":    round(float(np.mean(all_r)), 2),
-            "best_trade":    round(float(max(all_r)), 2),
-            "worst_trade":   round(float(min(all_r)), 2),
-            "avg_hold_days": round(float(np.mean(holds)), 1),
-        }
+        sim    = simulate_trades(c_r, buy_sig.to_numpy(dtype=bool)[first:],
+                                 sell_sig.to_numpy(dtype=bool)[first:])
+        trades = [_trade_dict(ticker, idx_r, c_r, rsi_r, e, x) for _, e, x in sim]
+        return _summarize(ticker, trades)
 
     except Exception:
         return {}
 
 
+def _window(df: pd.DataFrame, start) -> pd.DataFrame:
+    """Rows of an already-loaded frame from `start` on (same window _backtest_one_il reads)."""
+    if df is None or df.empty:
+        return df
+    return df.iloc[df.index.searchsorted(as_index_ts(start, df.index), side='left'):]
+
+
+def _backtest_preloaded(frames: dict, params: dict, end: datetime) -> list:
+    """
+    _backtest_one_il for many in-memory frames at once: one SignalPanel, one stacked
+    simulate_trades over (days × tickers), no threads. Same per-ticker results.
+    """
+    panel = SignalPanel(frames)
+    if not panel.tickers:
+        return []
+    buy, sell = panel.signals(params)
+    first = panel.row_of(end - timedelta(days=365))
+    close = panel.close[first:]
+    rsi   = panel.rsi(params.get('rsi_period', 14))[first:]
+    valid = panel.valid[first:]
+    idx   = panel.index[first:]
+    sim   = simulate_trades(close, buy[first:], sell[first:], valid)
+
+    by_col = {}
+    for col, e, x in sim:
+        by_col.setdefault(col, []).append((e, x))
+    results = []
+    for col, trades in by_col.items():
+        n = len(valid) - int(np.argmax(valid[::-1, col]))      # rows up to the ticker's last bar
+        t = panel.tickers[col]
+        results.append(_summarize(t, [_trade_dict(t, idx[:n], close[:n, col], rsi[:n, col], e, x)
+                                      for e, x in trades]))
+    return results
+
+
 def run_backtest_il(tickers: list, params: dict,
-                    progress_bar=None, status_text=None) -> dict:
+                    progress_bar=None, status_text=None, session=None,
+                    price_data: dict = None) -> dict:
+    """
+    Backtest `tickers` over the last year.
+    `price_data` ({ticker: OHLCV frame}, e.g. the frames Step 1 already loaded) and
+    tickers already held by `session` are backtested in memory in one vectorized pass;
+    only the remaining tickers are read per ticker (store / network) in the thread pool.
+    """
+    end, results = datetime.today(), []
+    start = end - timedelta(days=420)
+
+    frames = {}
+    for t in tickers:
+        if price_data is not None and t in price_data:
+            frames[t] = _window(price_data[t], start)
+        elif session is not None and t in session:
+            frames[t] = session.get(t, start=start)
+    if frames:
+        try:
+            results.extend(_backtest_preloaded(frames, params, end))
+        except Exception:
+            frames = {}                                   # fall back to the per-ticker path
+    rest = [t for t in tickers if t not in frames]
+
+    done, total = len(frames), len(tickers)
+    if progress_bar and total:
+        progress_bar.progress(done / total)
+    if rest:
+        with ThreadPoolExecutor(max_workers=6) as ex:
+            futures = {ex.submit(_backtest_one_il, t, params, session): t for t in rest}
+            for fut in as_completed(futures):
+                done += 1
+                if progress_bar:
+                    progress_bar.progress(done / total)
+                if status_text:
+                    status_text.caption(f"בק-טסט {done}/{total}…")
+                results.append(fut.result())
+
     per_stock = {}
     trade_log = []
-    done, total = 0, len(tickers)
-
-    with ThreadPoolExecutor(max_workers=6) as ex:
-        futures = {ex.submit(_backtest_one_il, t, params): t for t in tickers}
-        for fut in as_completed(futures):
-            done += 1
-            if progress_bar:
-                progress_bar.progress(done / total)
-            if status_text:
-                status_text.caption(f"בק-טסט {done}/{total}…")
-            res = fut.result()
-            if res and res.get('total_trades', 0) > 0:
-                t = res['ticker']
-                per_stock[t] = {k: res[k] for k in
-                    ['total_trades','wins','losses','win_rate',
-                     'avg_return','best_trade','worst_trade','avg_hold_days']}
-                trade_log.extend(res.get('trades', []))
+    for res in results:
+        if res and res.get('total_trades', 0) > 0:
+            t = res['ticker']
+            per_stock[t] = {k: res[k] for k in
+                ['total_trades','wins','losses','win_rate',
+                 'avg_return','best_trade','worst_trade','avg_hold_days']}
+            trade_log.extend(res.get('trades', []))
 
     if not trade_log:
         return {"overall": {}, "per_stock": {}, "trade_log": []}
@@ -200,3 +296,197 @@ def run_backtest_il(tickers: list, params: dict,
     }
     trade_log.sort(key=lambda x: x['buy_date'], reverse=True)
     return {"overall": overall, "per_stock": per_stock, "trade_log": trade_log}
+
+
+# ──────────────────────────────────────────────────────────────
+#  SIGNAL PANEL — many tickers, one date axis, cached indicators
+# ──────────────────────────────────────────────────────────────
+BACKTEST_DAYS = 420              # history loaded per ticker (1y test + warm-up)
+
+
+class SignalPanel:
+    """
+    Closes of many tickers on one date axis (union of their trading days) plus a
+    cache of indicator matrices per distinct period. Indicators are computed per
+    ticker on its own bars — exactly like _signals — then placed on the shared axis;
+    `valid` marks the rows where a ticker actually traded.
+    """
+
+    def __init__(self, frames: dict):
+        closes = {}
+        for t, df in frames.items():
+            if df is None or df.empty or 'Close' not in df.columns:
+                continue
+            c = df['Close'].dropna()
+            if len(c) >= 60:
+                closes[t] = c
+        self.tickers = list(closes)
+        self.index   = (pd.DatetimeIndex(sorted(set().union(*[c.index for c in closes.values()])))
+                        if closes else pd.DatetimeIndex([]))
+        self._series = closes
+        self._rows   = {t: self.index.get_indexer(c.index) for t, c in closes.items()}
+        self.close   = self._place({t: c.to_numpy(dtype=float) for t, c in closes.items()})
+        self.valid   = ~np.isnan(self.close)
+        self.ma50    = self._place({t: c.rolling(50).mean().to_numpy() for t, c in closes.items()})
+        self.ma_long = self._place({t: (c.rolling(120) if len(c) < 200 else c.rolling(200)).mean().to_numpy()
+                                    for t, c in closes.items()})
+        self._rsi = {}
+        self._bb  = {}
+
+    def _place(self, values: dict) -> np.ndarray:
+        mat = np.full((len(self.index), len(self.tickers)), np.nan)
+        for j, t in enumerate(self.tickers):
+            mat[self._rows[t], j] = values[t]
+        return mat
+
+    def rsi(self, period: int) -> np.ndarray:
+        if period not in self._rsi:
+            self._rsi[period] = self._place({t: _rsi(c, period).to_numpy()
+                                             for t, c in self._series.items()})
+        return self._rsi[period]
+
+    def bb_pct(self, period: int, std_dev: float) -> np.ndarray:
+        if period not in self._bb:
+            self._bb[period] = (
+                self._place({t: c.rolling(period).mean().to_numpy() for t, c in self._series.items()}),
+                self._place({t: c.rolling(period).std().to_numpy()  for t, c in self._series.items()}),
+            )
+        mid, sigma = self._bb[period]
+        lower = mid - std_dev * sigma
+        upper = mid + std_dev * sigma
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (self.close - lower) / (upper - lower)
+
+    def precompute(self, rsi_periods, bb_periods):
+        """Fill the cache up front (before handing the panel to worker processes)."""
+        for p in set(rsi_periods):
+            self.rsi(p)
+        for p in set(bb_periods):
+            self.bb_pct(p, 2.0)
+
+    def signals(self, params: dict) -> tuple:
+        """(buy, sell) boolean matrices — same rules as _signals."""
+        rsi = self.rsi(params.get('rsi_period', 14))
+        bb  = self.bb_pct(params.get('bb_period', 20), params.get('bb_std', 2.0))
+        c, ma50, ma_long = self.close, self.ma50, self.ma_long
+        with np.errstate(invalid='ignore'):
+            buy  = (rsi < params.get('rsi_max', 45)) & (bb < 0.40) & (c > ma_long) & (c > ma50 * 0.95)
+            sell = (rsi > 65) | (bb > 0.80) | (c < ma50 * 0.95)
+        return buy, sell
+
+    def row_of(self, ts) -> int:
+        """First row on/after `ts`."""
+        if not len(self.index):
+            return 0
+        return int(self.index.searchsorted(as_index_ts(ts, self.index), side='left'))
+
+
+def load_signal_panel(tickers: list, days: int = BACKTEST_DAYS, session=None,
+                      max_workers: int = 6) -> SignalPanel:
+    """One history read per ticker (session → local store), then a SignalPanel."""
+    start = datetime.today() - timedelta(days=days)
+
+    def load(t):
+        return t, (session.get(t, start=start) if session is not None
+                   else get_ohlcv(t, start=start))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        frames = dict(ex.map(load, tickers))
+    return SignalPanel(frames)
+
+
+def trade_returns(panel: SignalPanel, sim: list, first: int = 0, last: int = None) -> list:
+    """
+    [(col, return_%, is_open)] for simulate_trades output on panel rows [first:last].
+    Open trades are valued at the ticker's last bar in that range; returns are rounded
+    to 2 decimals like the trade log, so win/loss counts match run_backtest_il.
+    """
+    close = panel.close[first:last]
+    valid = panel.valid[first:last]
+    if close.size == 0:                          # no tickers / no rows in range
+        return []
+    last_row = len(close) - 1 - np.argmax(valid[::-1], axis=0)
+    out = []
+    for col, e, x in sim:
+        row = last_row[col] if x < 0 else x
+        bp  = float(close[e, col])
+        out.append((col, round((float(close[row, col]) - bp) / bp * 100, 2), x < 0))
+    return out
+
+
+def _trade_stats(rets: list) -> dict:
+    closed = [r for _, r, is_open in rets if not is_open]
+    wins   = sum(1 for r in closed if r > 0)
+    all_r  = [r for _, r, _ in rets]
+    return {
+        "total_trades":  len(rets),
+        "wins":          wins,
+        "losses":        len(closed) - wins,
+        "win_rate":      round(wins / len(closed) * 100, 1) if closed else 0.0,
+        "avg_return":    round(float(np.mean(all_r)), 2) if all_r else 0.0,
+        "tickers_traded": len({c for c, _, _ in rets}),
+    }
+
+
+def evaluate_params(panel: SignalPanel, params: dict, first: int = 0, last: int = None) -> dict:
+    """Aggregate stats of one parameter set over panel rows [first:last] (all tickers at once)."""
+    buy, sell = panel.signals(params)
+    sl  = slice(first, last)
+    sim = simulate_trades(panel.close[sl], buy[sl], sell[sl], panel.valid[sl])
+    return _trade_stats(trade_returns(panel, sim, first, last))
+
+
+# ──────────────────────────────────────────────────────────────
+#  PARAMETER SWEEP
+# ──────────────────────────────────────────────────────────────
+_SWEEP = {}
+
+
+def _sweep_init(panel: SignalPanel, first: int):
+    _SWEEP['panel'], _SWEEP['first'] = panel, first
+
+
+def _sweep_eval(combo: dict) -> dict:
+    return {**combo, **evaluate_params(_SWEEP['panel'], combo, _SWEEP['first'])}
+
+
+def run_backtest_sweep_il(tickers: list, grid: dict, base_params: dict = None,
+                          session=None, max_workers: int = None,
+                          progress_cb=None) -> pd.DataFrame:
+    """
+    Backtest every combination of `grid` (e.g. {'rsi_max': [35, 45, 55],
+    'bb_period': [15, 20], 'bb_std': [1.5, 2.0]}) over the last year.
+
+    - one history read per ticker, shared by all combinations
+    - RSI / Bollinger series cached once per distinct period
+    - combinations fanned out over a process pool (max_workers=1 → in-process)
+
+    Returns one row per combination: the grid values + total_trades, wins, losses,
+    win_rate, avg_return, tickers_traded — same numbers run_backtest_il's
+    "overall" would give for that combination.
+    """
+    base   = dict(base_params or {})
+    keys   = list(grid)
+    combos = [{**base, **dict(zip(keys, vals))} for vals in itertools.product(*grid.values())]
+    panel  = load_signal_panel(tickers, session=session)
+    first  = panel.row_of(datetime.today() - timedelta(days=365))
+    panel.precompute([c.get('rsi_period', 14) for c in combos],
+                     [c.get('bb_period', 20) for c in combos])
+
+    rows = []
+    if max_workers == 1 or len(combos) < 4:
+        _sweep_init(panel, first)
+        for i, c in enumerate(combos):
+            rows.append(_sweep_eval(c))
+            if progress_cb:
+                progress_cb(i + 1, len(combos))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_sweep_init,
+                                 initargs=(panel, first)) as ex:
+            for i, r in enumerate(ex.map(_sweep_eval, combos, chunksize=max(1, len(combos) // 32))):
+                rows.append(r)
+                if progress_cb:
+                    progress_cb(i + 1, len(combos))
+
+    cols = keys + ["total_trades", "wins", "losses", "win_rate", "avg_return", "tickers_traded"]
+    return pd.DataFrame(rows)[cols] if rows else pd.DataFrame(columns=cols)
@@ -0,0 +1,110 @@
+"""
+benchmark_il.py — TA-125 benchmark provider
+מדד ייחוס (ת"א 125) — נטען פעם אחת, בטוח לריצה מקבילית
+
+Logic:
+- Keyed by (TASE session date, lookback period) — default "2y", the same horizon the
+  screener loads for stocks, so beta / RS windows aren't cut to one year
+- Single-flight: the first thread that misses a key loads it under that key's lock;
+  concurrent callers wait for it and read the result instead of downloading again
+- BenchmarkData keeps the close and its returns, and hands out copies aligned to a
+  stock's date index (cached per index) — no index intersection per ticker
+"""
+
+import threading
+import pandas as pd
+
+from data_store_il import get_ohlcv
+from stock_universe_il import BENCHMARK_SYMBOLS
+
+
+BENCH_PERIOD = "2y"              # = screener history window
+
+
+class BenchmarkData:
+    """Benchmark close + returns, with per-index aligned copies."""
+
+    def __init__(self, symbol: str, close: pd.Series):
+        self.symbol   = symbol
+        self.close    = close.dropna()
+        self.returns  = self.close.pct_change().dropna()
+        self._aligned = {}
+        self._lock    = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def align(self, index: pd.DatetimeIndex) -> tuple:
+        """
+        (close, returns) as float arrays on `index` — NaN where the benchmark has no
+        bar (or no return) on that date. Stocks on the same calendar share one copy.
+        """
+        key = index.asi8.tobytes()                 # exact date set, not just its ends
+        with self._lock:
+            hit = self._aligned.get(key)
+        if hit is not None:
+            return hit
+        hit = (self.close.reindex(index).to_numpy(dtype=float),
+               self.returns.reindex(index).to_numpy(dtype=float))
+        with self._lock:
+            if len(self._aligned) > 256:
+                self._aligned.clear()
+            self._aligned[key] = hit
+        return hit
+
+
+class BenchmarkProvider:
+    """Single-flight cache of BenchmarkData per (session date, period)."""
+
+    def __init__(self, symbols: list = None):
+        self.symbols = symbols or BENCHMARK_SYMBOLS
+        self._data   = {}
+        self._locks  = {}
+        self._lock   = threading.Lock()
+
+    @staticmethod
+    def session_date():
+        return pd.Timestamp.now(tz="Asia/Jerusalem").date()
+
+    def _load(self, period: str):
+        # נסה ת"א 125, אם נכשל — ת"א 35
+        for sym in self.symbols:
+            try:
+                df = get_ohlcv(sym, period=period)
+            except Exception:
+                continue
+            if not df.empty and 'Close' in df.columns:
+                return BenchmarkData(sym, df['Close'])
+        return None
+
+    def get(self, period: str = BENCH_PERIOD):
+        """BenchmarkData for today's session, or None if no benchmark symbol has data."""
+        key = (self.session_date(), period)
+        with self._lock:
+            if key in self._data:
+                return self._data[key]
+            key_lock = self._locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in self._data:              # loaded while we waited
+                    return self._data[key]
+            data = self._load(period)
+            with self._lock:
+                for k in [k for k in self._data if k[0] != key[0]]:
+                    del self._data[k]              # older sessions are stale
+                if data is not None:               # a failed load is retried by the next caller
+                    self._data[key] = data
+                self._locks.pop(key, None)
+            return data
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_PROVIDER = BenchmarkProvider()
+
+
+def get_benchmark(period: str = BENCH_PERIOD):
+    """Shared provider → BenchmarkData (or None)."""
+    return _PROVIDER.get(period)
@@ -0,0 +1,253 @@
+"""
+cli_il.py — Headless entry point (cron / batch jobs)
+הרצה משורת הפקודה — סריקה, בק-טסט וניתוח VIX בלי Streamlit
+
+Usage:
+    python cli_il.py scan     [--sector Banks | --max-stocks 80 | --tickers TEVA.TA,ICL.TA] --out scan.json
+    python cli_il.py backtest [--scan-file scan.json | --tickers ...] --out bt.parquet
+    python cli_il.py vix      [--threshold 25 --lookback 730 | --surface] --out vix.json
+
+Logic:
+- Same pipeline as the dashboard: two-phase scan over one DataSession, the backtest
+  and the VIX analysis reuse the session's frames
+- Never imports streamlit / plotly
+- Output: .json → full result + params + per-stage wall times;
+          .parquet → the main table only (nested fields stored as JSON text)
+- Wall time per stage is printed to stderr
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from scan_config_il import SCAN_WORKERS
+
+
+# Sidebar defaults of app_il.render_sidebar
+DEFAULT_PARAMS = dict(
+    min_price=10, min_volume=100_000, min_beta=0.5,
+    rsi_min=10, rsi_max=55, rsi_period=14,
+    require_above_ma=True, require_above_50=True, require_above_20=False,
+    require_uptrend_52w=True, bb_period=20, bb_std=2.0,
+    show_fresh_only=False, selected_sector="All",
+)
+
+
+# ──────────────────────────────────────────────────────────────
+#  TIMING
+# ──────────────────────────────────────────────────────────────
+class StageTimer:
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = round(time.perf_counter() - t0, 3)
+            print(f"[{name}] {self.stages[name]:.2f}s", file=sys.stderr)
+
+
+# ──────────────────────────────────────────────────────────────
+#  OUTPUT
+# ──────────────────────────────────────────────────────────────
+def _jsonable(o):
+    if isinstance(o, (np.integer,)):
+        return int(o)
+    if isinstance(o, (np.floating,)):
+        return None if np.isnan(o) else float(o)
+    if isinstance(o, np.bool_):
+        return bool(o)
+    if isinstance(o, (pd.Timestamp, pd.Timedelta)):
+        return o.isoformat()
+    if isinstance(o, pd.DataFrame):
+        return o.reset_index().to_dict(orient="records")
+    return str(o)
+
+
+def _table(rows: list) -> pd.DataFrame:
+    df = pd.DataFrame(rows)
+    for col in df.columns:
+        if df[col].map(lambda v: isinstance(v, (list, dict))).any():
+            df[col] = df[col].map(lambda v: json.dumps(v, ensure_ascii=False, default=_jsonable))
+    return df
+
+
+def write_output(path: str, payload: dict, table: list):
+    """JSON → whole payload; Parquet → `table` rows; no path → JSON to stdout."""
+    if path and path.endswith(".parquet"):
+        _table(table).to_parquet(path, index=False)
+        return
+    text = json.dumps(payload, ensure_ascii=False, indent=1, default=_jsonable)
+    if not path:
+        print(text)
+        return
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+# ──────────────────────────────────────────────────────────────
+#  COMMANDS
+# ──────────────────────────────────────────────────────────────
+def _universe(args) -> list:
+    from stock_universe_il import STOCK_UNIVERSE_IL, get_by_sector
+    if args.tickers:
+        return [t.strip().upper() if t.strip().upper().endswith(".TA") else t.strip().upper() + ".TA"
+                for t in args.tickers.split(",") if t.strip()]
+    if args.sector and args.sector != "All":
+        return get_by_sector(args.sector) or STOCK_UNIVERSE_IL
+    return STOCK_UNIVERSE_IL[:args.max_stocks] if args.max_stocks else STOCK_UNIVERSE_IL
+
+
+def _params(args) -> dict:
+    p = dict(DEFAULT_PARAMS)
+    for k in ("min_price", "min_volume", "min_beta", "rsi_min", "rsi_max", "rsi_period",
+              "bb_period", "bb_std"):
+        v = getattr(args, k, None)
+        if v is not None:
+            p[k] = v
+    if getattr(args, "no_ma", False):
+        p["require_above_ma"] = False
+    if getattr(args, "no_ma50", False):
+        p["require_above_50"] = False
+    if getattr(args, "no_uptrend", False):
+        p["require_uptrend_52w"] = False
+    if args.sector:
+        p["selected_sector"] = args.sector
+    return p
+
+
+def _scan(universe, params, session, timer, workers) -> tuple[list, dict]:
+    from scan_engine_il import run_two_phase_scan_il
+    from metadata_cache_il import prefetch_metadata, apply_metadata
+    with timer.stage("scan"):
+        results, stats = run_two_phase_scan_il(universe, params, session, workers)
+    with timer.stage("metadata"):
+        prefetch_metadata([r['ticker'] for r in results])
+        apply_metadata(results)
+    results.sort(key=lambda x: (-x.get('score', 0), x.get('ticker', '')))
+    return results, stats
+
+
+def cmd_scan(args, timer) -> tuple:
+    from data_store_il import DataSession
+    universe, params = _universe(args), _params(args)
+    session = DataSession()
+    results, stats = _scan(universe, params, session, timer, args.workers)
+    return {"params": params, "stats": stats, "results": results}, results
+
+
+def cmd_backtest(args, timer) -> tuple:
+    from data_store_il import DataSession
+    from backtester_il import run_backtest_il
+    params  = _params(args)
+    session = DataSession()
+    if args.scan_file:
+        with open(args.scan_file, encoding="utf-8") as f:
+            tickers = [r['ticker'] for r in json.load(f).get("results", [])]
+    elif args.tickers:
+        tickers = _universe(args)
+    else:
+        results, _ = _scan(_universe(args), params, session, timer, args.workers)
+        tickers = [r['ticker'] for r in results]
+    with timer.stage("load"):
+        session.preload(tickers)
+    with timer.stage("backtest"):
+        bt = run_backtest_il(tickers, params, session=session)
+    return {"params": params, "tickers": tickers, **bt}, bt.get("trade_log", [])
+
+
+def cmd_vix(args, timer) -> tuple:
+    from data_store_il import DataSession
+    from vix_analyzer import run_vix_spike_analysis, run_vix_threshold_surface, rank_surface
+    tickers = _universe(args)
+    session = DataSession()
+    with timer.stage("load"):
+        session.preload(tickers)
+    if args.surface:
+        with timer.stage("vix_surface"):
+            surface = run_vix_threshold_surface(tickers, args.lookback, session=session)
+        if surface.get("error"):
+            return surface, []
+        ranked = rank_surface(surface, args.min_events)
+        return ({"lookback_days": args.lookback, "ranking": ranked,
+                 "avg_return": surface["avg_return"], "pct_rose": surface["pct_rose"],
+                 "num_events": surface["num_events"]},
+                ranked.to_dict(orient="records"))
+    with timer.stage("vix"):
+        data = run_vix_spike_analysis(tickers, args.threshold, args.lookback, session=session)
+    return data, data.get("all_stocks", [])
+
+
+# ──────────────────────────────────────────────────────────────
+#  MAIN
+# ──────────────────────────────────────────────────────────────
+def build_parser() -> argparse.ArgumentParser:
+    ap  = argparse.ArgumentParser(prog="cli_il", description="TASE scanner — headless runs")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    def common(p):
+        p.add_argument("--tickers", help="comma-separated list (.TA added if missing)")
+        p.add_argument("--sector", help="sector from SECTOR_MAP")
+        p.add_argument("--max-stocks", type=int, dest="max_stocks")
+        p.add_argument("--workers", type=int, default=SCAN_WORKERS)
+        p.add_argument("--out", help="output path (.json or .parquet); stdout JSON if omitted")
+
+    def filters(p):
+        p.add_argument("--min-price", type=float, dest="min_price")
+        p.add_argument("--min-volume", type=float, dest="min_volume", help="shares/day")
+        p.add_argument("--min-beta", type=float, dest="min_beta")
+        p.add_argument("--rsi-min", type=float, dest="rsi_min")
+        p.add_argument("--rsi-max", type=float, dest="rsi_max")
+        p.add_argument("--rsi-period", type=int, dest="rsi_period")
+        p.add_argument("--bb-period", type=int, dest="bb_period")
+        p.add_argument("--bb-std", type=float, dest="bb_std")
+        p.add_argument("--no-ma", action="store_true", dest="no_ma")
+        p.add_argument("--no-ma50", action="store_true", dest="no_ma50")
+        p.add_argument("--no-uptrend", action="store_true", dest="no_uptrend")
+
+    p = sub.add_parser("scan", help="two-phase screener scan")
+    common(p); filters(p)
+
+    p = sub.add_parser("backtest", help="1-year signal backtest")
+    common(p); filters(p)
+    p.add_argument("--scan-file", dest="scan_file", help="JSON written by `scan` — backtest its results")
+
+    p = sub.add_parser("vix", help="stock behaviour during VIX spikes")
+    common(p)
+    p.add_argument("--threshold", type=float, default=25.0)
+    p.add_argument("--lookback", type=int, default=730, help="days")
+    p.add_argument("--surface", action="store_true", help="all thresholds 18–50 at once")
+    p.add_argument("--min-events", type=int, default=2, dest="min_events")
+    return ap
+
+
+COMMANDS = {"scan": cmd_scan, "backtest": cmd_backtest, "vix": cmd_vix}
+
+
+def main(argv=None) -> int:
+    args  = build_parser().parse_args(argv)
+    timer = StageTimer()
+    t0    = time.perf_counter()
+    payload, table = COMMANDS[args.command](args, timer)
+    timer.stages["total"] = round(time.perf_counter() - t0, 3)
+    payload = {"command": args.command, "generated_at": pd.Timestamp.now().isoformat(),
+               "timings": timer.stages, **payload}
+    with timer.stage("write"):
+        write_output(args.out, payload, table)
+    print(f"[total] {timer.stages['total']:.2f}s", file=sys.stderr)
+    return 0 if not payload.get("error") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
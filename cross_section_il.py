@@ -0,0 +1,284 @@
+"""
+cross_section_il.py — Beta / correlation / RS vs TA-125 for the whole universe at once
+בטא, מתאם ועוצמה יחסית מול ת"א 125 — כל המניות במטריצה אחת
+
+Logic:
+- Every stock is placed on the benchmark's date axis: one (days × tickers) matrix of
+  closes and one of returns (each stock's own bar-to-bar return), NaN where the stock
+  has no bar on a benchmark day
+- Missing data is handled pairwise: each stock's moments use only the days where both
+  it and the benchmark have a return — the same days the per-ticker intersection used
+- The sums behind cov / var / corr are a handful of matrix-vector products (BLAS);
+  no np.cov or index intersection per ticker
+- Same rules and rounding as screener_il._beta_tase / _relative_strength_tase:
+  beta = cov(ddof=1) / var(ddof=0), < 30 common returns → 1.0;
+  RS = 63-day return / |benchmark return| on the common days, 1.0 when history is short
+- Rolling 60 / 120-day beta and correlation: window sums come from differences of
+  cumulative sums — O(days) per stock whatever the window, no np.cov per window
+- correlation_matrix(): stock × stock pairwise-complete correlations from four
+  matrix products
+"""
+
+import numpy as np
+import pandas as pd
+
+from benchmark_il import get_benchmark
+from data_store_il import get_ohlcv
+
+
+MIN_BETA_OBS  = 30               # common returns needed for a beta
+RS_WINDOW     = 63               # ~3 months of bars
+RS_MIN_BARS   = 65               # stock / benchmark history needed for RS
+RS_MIN_COMMON = 50               # common days needed for RS
+ROLLING_WINDOWS = (60, 120)      # bars
+CORR_MIN_OBS  = 60               # common returns needed for a pair in the correlation matrix
+
+
+# ──────────────────────────────────────────────────────────────
+#  ALIGNED MATRICES
+# ──────────────────────────────────────────────────────────────
+def aligned_matrices(closes: dict, index: pd.DatetimeIndex) -> tuple:
+    """
+    {ticker: close Series} → (tickers, close matrix, return matrix, bars per ticker),
+    matrices shaped (len(index), n_tickers), NaN where the stock has no bar on that day.
+    Returns are taken on the stock's own bars (pct_change), then placed on `index`.
+    """
+    tickers = [t for t, c in closes.items() if c is not None and len(c)]
+    C = np.full((len(index), len(tickers)), np.nan)
+    R = np.full((len(index), len(tickers)), np.nan)
+    bars = np.zeros(len(tickers), dtype=int)
+    for j, t in enumerate(tickers):
+        c    = closes[t]
+        v    = c.ffill().to_numpy(dtype=float)          # pct_change pads gaps the same way
+        rows = index.get_indexer(c.index)
+        ok   = rows >= 0
+        C[rows[ok], j] = c.to_numpy(dtype=float)[ok]
+        if len(v) > 1:
+            r = np.empty(len(v))
+            r[0]  = np.nan
+            r[1:] = v[1:] / v[:-1] - 1
+            R[rows[ok], j] = r[ok]
+        bars[j] = len(c)
+    return tickers, C, R, bars
+
+
+# ──────────────────────────────────────────────────────────────
+#  MOMENTS
+# ──────────────────────────────────────────────────────────────
+def pairwise_moments(R: np.ndarray, m: np.ndarray) -> tuple:
+    """
+    Pairwise-complete moments of each column of R against the vector m.
+    Returns (n, cov ddof=1, var_x ddof=0, var_m ddof=0) per column — each computed
+    only over the rows where both R[:, j] and m are present.
+    """
+    M  = ~np.isnan(R) & ~np.isnan(m)[:, None]
+    Mf = M.astype(float)
+    n  = Mf.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # shift both sides by their means first — keeps the one-pass sums well conditioned
+        cx = np.where(M, R, 0.0).sum(axis=0) / n
+        cy = np.nanmean(m) if np.isfinite(m).any() else 0.0
+        X  = np.where(M, R - cx, 0.0)
+        y  = np.where(np.isnan(m), 0.0, m - cy)
+
+        Sy, Syy = np.stack([y, y * y]) @ Mf              # per-column sums of m over the mask
+        Sx  = X.sum(axis=0)
+        Sxx = (X * X).sum(axis=0)
+        Sxy = y @ X
+
+        cov   = (Sxy - Sx * Sy / n) / (n - 1)
+        var_x = (Sxx - Sx * Sx / n) / n
+        var_m = (Syy - Sy * Sy / n) / n
+    return n, cov, var_x, var_m
+
+
+def _relative_strength(C: np.ndarray, bench: np.ndarray, bars: np.ndarray,
+                       bench_bars: int) -> np.ndarray:
+    """RS per column on the days where the stock has a bar (bench has no gaps on its own axis)."""
+    rs = np.ones(C.shape[1])
+    if not C.size or bench_bars < RS_MIN_BARS:
+        return rs
+    present = ~np.isnan(C)
+    cnt     = present.cumsum(axis=0)
+    total   = cnt[-1]
+    # fewer than 50 common days → 1.0; 50–62 → the per-ticker iloc[-63] failed → 1.0 as well
+    ok      = (bars >= RS_MIN_BARS) & (total >= max(RS_MIN_COMMON, RS_WINDOW))
+    if not ok.any():
+        return rs
+    last  = len(C) - 1 - np.argmax(present[::-1], axis=0)
+    start = np.argmax(present & (cnt == (total - RS_WINDOW + 1)), axis=0)
+    cols  = np.arange(C.shape[1])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        s0, s1 = C[start, cols], C[last, cols]
+        stock_ret = s1 / s0 - 1
+        bench_ret = bench[last] / bench[start] - 1
+    for j in np.flatnonzero(ok):
+        if s0[j] == 0 or bench_ret[j] == 0:
+            continue
+        rs[j] = round(float(stock_ret[j] / abs(bench_ret[j])), 2)
+    return rs
+
+
+def _rolling_sum(a: np.ndarray, window: int) -> np.ndarray:
+    """Sum of the last `window` rows at every row (fewer at the start) — cumsum difference."""
+    cs = np.cumsum(a, axis=0)
+    out = cs.copy()
+    out[window:] -= cs[:-window]
+    return out
+
+
+def rolling_beta_corr(R: np.ndarray, m: np.ndarray, window: int, min_obs: int = None) -> tuple:
+    """
+    Rolling beta / correlation of each column of R against m over `window` rows.
+    Pairwise-complete inside each window; NaN where fewer than `min_obs` common returns
+    (default: half the window, at least MIN_BETA_OBS). Beta here is the plain OLS slope
+    (same ddof on both sides). Returns two (rows × columns) arrays.
+    """
+    min_obs = min_obs or max(MIN_BETA_OBS, window // 2)
+    M  = ~np.isnan(R) & ~np.isnan(m)[:, None]
+    Mf = M.astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        n  = Mf.sum(axis=0)
+        cx = np.where(M, R, 0.0).sum(axis=0) / n           # centring only — cancels out below
+        cy = np.nanmean(m) if np.isfinite(m).any() else 0.0
+        X  = np.where(M, R - np.nan_to_num(cx), 0.0)
+        Y  = np.where(M, (m - cy)[:, None], 0.0)
+
+        n   = _rolling_sum(Mf, window)
+        Sx  = _rolling_sum(X, window)
+        Sy  = _rolling_sum(Y, window)
+        Sxy = _rolling_sum(X * Y, window)
+        Sxx = _rolling_sum(X * X, window)
+        Syy = _rolling_sum(Y * Y, window)
+
+        cov   = Sxy - Sx * Sy / n
+        var_x = Sxx - Sx * Sx / n
+        var_y = Syy - Sy * Sy / n
+        ok    = (n >= min_obs) & (var_y > 0)
+        beta  = np.where(ok, cov / var_y, np.nan)
+        corr  = np.where(ok & (var_x > 0), cov / np.sqrt(var_x * var_y), np.nan)
+    return beta, np.clip(corr, -1.0, 1.0)
+
+
+# ──────────────────────────────────────────────────────────────
+#  PUBLIC
+# ──────────────────────────────────────────────────────────────
+def cross_section_stats(closes: dict, bench=None) -> pd.DataFrame:
+    """
+    {ticker: close Series} → DataFrame indexed by ticker with beta, corr, rs, n_obs.
+    `bench` — BenchmarkData (default: the shared TA-125 from benchmark_il).
+    Without a benchmark every beta / RS is 1.0 and corr is NaN, like the per-ticker path.
+    """
+    cols = ["beta", "corr", "rs", "n_obs"]
+    bench = bench if bench is not None else get_benchmark()
+    if bench is None or not len(bench):
+        tickers = [t for t, c in closes.items() if c is not None and len(c)]
+        return pd.DataFrame({"beta": 1.0, "corr": np.nan, "rs": 1.0, "n_obs": 0},
+                            index=pd.Index(tickers, name="ticker"), columns=cols)
+
+    index = bench.close.index
+    tickers, C, R, bars = aligned_matrices(closes, index)
+    m = bench.returns.reindex(index).to_numpy(dtype=float)
+
+    n, cov, var_x, var_m = pairwise_moments(R, m)
+    beta = np.ones(len(tickers))
+    corr = np.full(len(tickers), np.nan)
+    for j in range(len(tickers)):
+        if n[j] < MIN_BETA_OBS:
+            continue
+        if var_m[j] > 0:
+            beta[j] = round(float(cov[j] / var_m[j]), 2)
+        if var_m[j] > 0 and var_x[j] > 0:
+            corr[j] = round(float(cov[j] * (n[j] - 1) / n[j] / np.sqrt(var_x[j] * var_m[j])), 2)
+
+    rs = _relative_strength(C, bench.close.to_numpy(dtype=float), bars, len(bench))
+    return pd.DataFrame({"beta": beta, "corr": corr, "rs": rs, "n_obs": n.astype(int)},
+                        index=pd.Index(tickers, name="ticker"), columns=cols)
+
+
+def universe_beta_rs(tickers: list, session=None, period: str = "2y") -> dict:
+    """
+    Cross-section for `tickers` over the same 2y window the screener loads →
+    {ticker: {"beta", "corr", "rs"}} for compute_metrics_il(cross=...). {} on failure.
+    """
+    try:
+        closes = {}
+        for t in tickers:
+            df = session.get(t, period=period) if session is not None else get_ohlcv(t, period=period)
+            if not df.empty and 'Close' in df.columns:
+                closes[t] = df['Close']
+        stats = cross_section_stats(closes)
+        return stats[["beta", "corr", "rs"]].to_dict(orient="index")
+    except Exception:
+        return {}
+
+
+def rolling_stats(closes: dict, bench=None, windows: tuple = ROLLING_WINDOWS) -> dict:
+    """
+    {ticker: close Series} → {window: {"beta": DataFrame, "corr": DataFrame}} on the
+    benchmark's dates, one column per ticker. {} without a benchmark.
+    """
+    bench = bench if bench is not None else get_benchmark()
+    if bench is None or not len(bench):
+        return {}
+    index = bench.close.index
+    tickers, _, R, _ = aligned_matrices(closes, index)
+    m = bench.returns.reindex(index).to_numpy(dtype=float)
+    out = {}
+    for w in windows:
+        beta, corr = rolling_beta_corr(R, m, w)
+        out[w] = {"beta": pd.DataFrame(beta, index=index, columns=tickers),
+                  "corr": pd.DataFrame(corr, index=index, columns=tickers)}
+    return out
+
+
+def rolling_beta_series(close: pd.Series, bench=None, windows: tuple = ROLLING_WINDOWS) -> pd.DataFrame:
+    """
+    One stock → DataFrame with beta_<w> / corr_<w> per window, on the days the stock
+    traded. Empty if there is no benchmark.
+    """
+    stats = rolling_stats({"_": close}, bench, windows)
+    if not stats:
+        return pd.DataFrame()
+    df = pd.DataFrame({f"{k}_{w}": stats[w][k]["_"] for w in windows for k in ("beta", "corr")})
+    return df[df.index.isin(close.index)]
+
+
+def correlation_matrix(closes: dict, min_obs: int = CORR_MIN_OBS, days: int = None) -> pd.DataFrame:
+    """
+    Stock × stock correlation of daily returns, pairwise-complete: each pair uses only
+    the days both traded (NaN if fewer than `min_obs`). `days` keeps the last N rows of
+    the union trading calendar.
+    """
+    closes = {t: c.dropna() for t, c in closes.items() if c is not None and len(c.dropna())}
+    if not closes:
+        return pd.DataFrame()
+    index = pd.DatetimeIndex(sorted(set().union(*[c.index for c in closes.values()])))
+    tickers, _, R, _ = aligned_matrices(closes, index)
+    if days:
+        R = R[-days:]
+    M  = ~np.isnan(R)
+    Mf = M.astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(M, R, 0.0).sum(axis=0) / Mf.sum(axis=0)
+        X    = np.where(M, R - np.nan_to_num(mean), 0.0)
+        N    = Mf.T @ Mf                       # common days per pair
+        S    = X.T @ Mf                        # S[i, j] = Σ x_i over the days j also traded
+        SS   = (X * X).T @ Mf
+        cov  = X.T @ X - S * S.T / N
+        var  = SS - S * S / N
+        corr = cov / np.sqrt(var * var.T)
+    corr = np.where((N >= min_obs) & (var > 0) & (var.T > 0), np.clip(corr, -1.0, 1.0), np.nan)
+    np.fill_diagonal(corr, np.where(np.diag(N) >= min_obs, 1.0, np.nan))
+    return pd.DataFrame(corr, index=tickers, columns=tickers)
+
+
+def universe_correlation(tickers: list, session=None, period: str = "1y",
+                         min_obs: int = CORR_MIN_OBS) -> pd.DataFrame:
+    """correlation_matrix for `tickers` from the session (or the local store)."""
+    closes = {}
+    for t in tickers:
+        df = session.get(t, period=period) if session is not None else get_ohlcv(t, period=period)
+        if not df.empty and 'Close' in df.columns:
+            closes[t] = df['Close']
+    return correlation_matrix(closes, min_obs)
@@ -0,0 +1,429 @@
+"""
+data_store_il.py — Local OHLCV store for TASE tickers
+מאגר נתונים מקומי — קובץ Parquet לכל מניה, עדכון הדרגתי
+
+Logic:
+- Every ticker lives in its own Parquet file under .cache/ohlcv/
+- First request downloads STORE_PERIOD of daily bars (covers scan, backtest, VIX, chart)
+- A full download records how far back it asked (<ticker>.from), so a ticker whose
+  history is shorter than a long request isn't downloaded again on every call
+- Later requests download only the tail since the last stored bar
+- The tail overlaps the stored data by a few bars: if the adjusted closes no longer
+  match (dividend / split re-adjustment) the ticker is re-downloaded in full
+- A file touched less than MAX_AGE_SECONDS ago is served without any network call
+- fetch_batch() updates a whole universe with one yf.download request per chunk
+- DataSession keeps one in-memory frame per ticker for a run (scan → backtest → VIX → chart)
+"""
+
+import os
+import re
+import threading
+import time
+import yfinance as yf
+import pandas as pd
+import numpy as np
+from datetime import datetime, timedelta
+
+
+CACHE_DIR       = os.environ.get(
+    "TASE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+OHLCV_DIR       = os.path.join(CACHE_DIR, "ohlcv")
+STORE_PERIOD    = "5y"
+MAX_AGE_SECONDS = 15 * 60        # intraday: refresh the last bar at most every 15 min
+OVERLAP_DAYS    = 7              # calendar days re-downloaded before the last stored bar
+ADJ_TOLERANCE   = 0.005          # 0.5% close mismatch on overlap → full re-download
+
+_COLS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+_LOCKS      = {}
+_LOCKS_LOCK = threading.Lock()
+
+
+# ──────────────────────────────────────────────────────────────
+#  HELPERS
+# ──────────────────────────────────────────────────────────────
+def _lock_for(ticker: str) -> threading.Lock:
+    with _LOCKS_LOCK:
+        if ticker not in _LOCKS:
+            _LOCKS[ticker] = threading.Lock()
+        return _LOCKS[ticker]
+
+
+def _path(ticker: str) -> str:
+    safe = re.sub(r'[^A-Za-z0-9._-]', '_', ticker)
+    return os.path.join(OHLCV_DIR, f"{safe}.parquet")
+
+
+def _period_days(period: str) -> int:
+    """'2y' → 730, '6mo' → 186, '420d' → 420. 'max' → a very large number."""
+    if not period or period == "max":
+        return 100_000
+    m = re.fullmatch(r'(\d+)(d|wk|mo|y)', period)
+    if not m:
+        return 365
+    n, unit = int(m.group(1)), m.group(2)
+    return n * {"d": 1, "wk": 7, "mo": 365 // 12 + 1, "y": 365}[unit]
+
+
+def _clean(df: pd.DataFrame) -> pd.DataFrame:
+    if df is None or df.empty:
+        return pd.DataFrame()
+    # Handle MultiIndex columns (yfinance quirk)
+    if isinstance(df.columns, pd.MultiIndex):
+        df = df.copy()
+        df.columns = df.columns.get_level_values(0)
+    if 'Close' not in df.columns:
+        return pd.DataFrame()
+    cols = [c for c in _COLS if c in df.columns]
+    df = df[cols].dropna(subset=['Close'])
+    df = df[~df.index.duplicated(keep='last')].sort_index()
+    return df.astype(float)
+
+
+def _download(ticker: str, **kwargs) -> pd.DataFrame:
+    try:
+        df = yf.Ticker(ticker).history(interval="1d", auto_adjust=True,
+                                       actions=False, **kwargs)
+        return _clean(df)
+    except Exception:
+        return pd.DataFrame()
+
+
+def as_index_ts(ts, index: pd.DatetimeIndex) -> pd.Timestamp:
+    """Timestamp comparable with `index` (matching tz-awareness)."""
+    ts = pd.Timestamp(ts)
+    tz = getattr(index, 'tz', None)
+    if tz is not None:
+        return ts.tz_localize(tz) if ts.tzinfo is None else ts.tz_convert(tz)
+    return ts.tz_localize(None) if ts.tzinfo is not None else ts
+
+
+def _slice(df: pd.DataFrame, start=None) -> pd.DataFrame:
+    """Rows from `start` on — a positional slice, so no data is copied."""
+    if df.empty or start is None:
+        return df
+    pos = df.index.searchsorted(as_index_ts(start, df.index), side='left')
+    return df.iloc[pos:]
+
+
+def _window_start(period: str = "1y", start=None):
+    if start is not None:
+        return start
+    if period == "max":
+        return None
+    return datetime.today() - timedelta(days=_period_days(period))
+
+
+# ──────────────────────────────────────────────────────────────
+#  READ / WRITE
+# ──────────────────────────────────────────────────────────────
+def read_stored(ticker: str) -> pd.DataFrame:
+    """Stored bars for `ticker` without touching the network (empty if none)."""
+    path = _path(ticker)
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    try:
+        return pd.read_parquet(path)
+    except Exception:
+        return pd.DataFrame()
+
+
+def _write(ticker: str, df: pd.DataFrame):
+    os.makedirs(OHLCV_DIR, exist_ok=True)
+    path = _path(ticker)
+    tmp  = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        df.to_parquet(tmp)
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _from_path(ticker: str) -> str:
+    return _path(ticker)[:-len(".parquet")] + ".from"
+
+
+def _mark_full(ticker: str, days: int):
+    """Record that the stored frame is a full download reaching back `days` from today."""
+    try:
+        with open(_from_path(ticker), "w") as f:
+            f.write((datetime.today() - timedelta(days=days)).date().isoformat())
+    except Exception:
+        pass
+
+
+def _requested_from(ticker: str):
+    """Start date the last full download asked for, or None."""
+    try:
+        with open(_from_path(ticker)) as f:
+            return datetime.fromisoformat(f.read().strip())
+    except Exception:
+        return None
+
+
+def stored_age(ticker: str):
+    """Seconds since `ticker`'s stored file was last written, or None if there is none."""
+    try:
+        return time.time() - os.path.getmtime(_path(ticker))
+    except OSError:
+        return None
+
+
+def _is_fresh(ticker: str) -> bool:
+    try:
+        return time.time() - os.path.getmtime(_path(ticker)) < MAX_AGE_SECONDS
+    except OSError:
+        return False
+
+
+def merge_tail(stored: pd.DataFrame, tail: pd.DataFrame):
+    """
+    Append `tail` to `stored`. Returns the merged frame, or None when the overlapping
+    closes disagree (history was re-adjusted and must be re-downloaded in full).
+    """
+    if stored.empty:
+        return tail
+    if tail.empty:
+        return stored
+    overlap = stored.index.intersection(tail.index)
+    # today's bar may still be moving — compare completed bars only
+    overlap = overlap[overlap < stored.index[-1]]
+    if len(overlap):
+        old = stored.loc[overlap, 'Close'].values
+        new = tail.loc[overlap, 'Close'].values
+        with np.errstate(divide='ignore', invalid='ignore'):
+            diff = np.nanmax(np.abs(new - old) / np.abs(old))
+        if not np.isfinite(diff) or diff > ADJ_TOLERANCE:
+            return None
+    merged = pd.concat([stored[stored.index < tail.index[0]], tail])
+    return merged[~merged.index.duplicated(keep='last')].sort_index()
+
+
+# ──────────────────────────────────────────────────────────────
+#  PUBLIC API
+# ──────────────────────────────────────────────────────────────
+def update_ticker(ticker: str, min_days: int = 0) -> pd.DataFrame:
+    """
+    Bring the stored history of `ticker` up to date and return all of it.
+    Downloads STORE_PERIOD on first use (or `min_days` if longer), otherwise only
+    the missing tail.
+    """
+    with _lock_for(ticker):
+        stored = read_stored(ticker)
+        long_request = min_days > _period_days(STORE_PERIOD)
+        asked_from   = _requested_from(ticker) if long_request and not stored.empty else None
+        covers = not stored.empty and (
+            not long_request
+            or (stored.index[-1] - stored.index[0]).days >= min_days - 10
+            # already downloaded from that far back — the ticker just has less history
+            or (asked_from is not None
+                and asked_from <= datetime.today() - timedelta(days=min_days - 10)))
+
+        if covers:
+            if _is_fresh(ticker):
+                return stored
+            tail_start = (stored.index[-1] - timedelta(days=OVERLAP_DAYS)).date()
+            tail = _download(ticker, start=tail_start.isoformat())
+            if tail.empty:                      # weekend / holiday — nothing new yet
+                os.utime(_path(ticker))
+                return stored
+            merged = merge_tail(stored, tail)
+            if merged is not None:
+                _write(ticker, merged)
+                return merged
+
+        if not long_request:
+            df = _download(ticker, period=STORE_PERIOD)
+        elif min_days >= _period_days("max"):
+            df = _download(ticker, period="max")
+        else:
+            df = _download(ticker, start=(datetime.today() - timedelta(days=min_days)).date().isoformat())
+        if df.empty:
+            return stored
+        _write(ticker, df)
+        _mark_full(ticker, max(min_days, _period_days(STORE_PERIOD)))
+        return df
+
+
+def get_ohlcv(ticker: str, period: str = "1y", start=None) -> pd.DataFrame:
+    """
+    Daily OHLCV for `ticker` from the local store, fetching only what is missing.
+    Window = `start` if given, else the trailing `period` ('6mo', '1y', '2y', …).
+    """
+    try:
+        start = _window_start(period, start)
+        if start is None:
+            days = _period_days("max")
+        else:
+            days = (datetime.today() - pd.Timestamp(start).to_pydatetime().replace(tzinfo=None)).days
+        df = update_ticker(ticker, min_days=days)
+        return _slice(df, start)
+    except Exception:
+        return pd.DataFrame()
+
+
+# ──────────────────────────────────────────────────────────────
+#  BATCH FETCH
+# ──────────────────────────────────────────────────────────────
+BATCH_CHUNK_SIZE = 50
+BATCH_RETRIES    = 2
+_DEFAULT_TZ      = "Asia/Jerusalem"
+
+
+def _split_batch(raw: pd.DataFrame, tickers: list) -> dict:
+    """Split a `yf.download(group_by='ticker')` frame into one clean frame per ticker."""
+    if raw is None or raw.empty:
+        return {}
+    if not isinstance(raw.columns, pd.MultiIndex):
+        return {tickers[0]: _clean(raw)} if len(tickers) == 1 else {}
+    level0 = set(raw.columns.get_level_values(0))
+    out = {}
+    for t in tickers:
+        if t in level0:
+            df = _clean(raw[t])
+            if not df.empty:
+                out[t] = df
+    return out
+
+
+def _download_chunk(chunk: list, retries: int, **kwargs) -> dict:
+    for attempt in range(retries + 1):
+        try:
+            raw = yf.download(chunk, interval="1d", auto_adjust=True, actions=False,
+                              group_by='ticker', ignore_tz=False, threads=True,
+                              progress=False, **kwargs)
+            frames = _split_batch(raw, chunk)
+            if frames:
+                return frames
+        except Exception:
+            pass
+        if attempt < retries:
+            time.sleep(1.5 * (attempt + 1))
+    return {}
+
+
+def _localize_like(df: pd.DataFrame, stored: pd.DataFrame) -> pd.DataFrame:
+    if df.empty or df.index.tz is not None:
+        return df
+    tz = stored.index.tz if not stored.empty and stored.index.tz is not None else _DEFAULT_TZ
+    df = df.copy()
+    df.index = df.index.tz_localize(tz)
+    return df
+
+
+def fetch_quotes(tickers: list, period: str = "1mo", chunk_size: int = BATCH_CHUNK_SIZE,
+                 retries: int = BATCH_RETRIES) -> dict:
+    """
+    Short recent history for many tickers in batched requests — NOT written to the
+    store (a 1-month file would look like a complete history). Used by the prefilter.
+    """
+    out = {}
+    for i in range(0, len(tickers), chunk_size):
+        out.update(_download_chunk(tickers[i:i + chunk_size], retries, period=period))
+    return out
+
+
+def fetch_batch(tickers: list, chunk_size: int = BATCH_CHUNK_SIZE,
+                retries: int = BATCH_RETRIES, progress_cb=None) -> dict:
+    """
+    Bring many tickers up to date with one `yf.download` request per chunk.
+    Tickers with a fresh file are skipped; stored ones get a tail download,
+    new ones (or re-adjusted ones) get STORE_PERIOD. Failed chunks are retried
+    `retries` times; tickers still missing are left for `get_ohlcv` to fetch alone.
+
+    progress_cb(done, total) is called after each chunk.
+    Returns {ticker: full stored frame} for every ticker that has data.
+    """
+    stored = {t: read_stored(t) for t in tickers}
+    result = {t: df for t, df in stored.items() if not df.empty and _is_fresh(t)}
+    tails  = [t for t in tickers if t not in result and not stored[t].empty]
+    fulls  = [t for t in tickers if t not in result and stored[t].empty]
+
+    jobs = [("tail", tails[i:i + chunk_size]) for i in range(0, len(tails), chunk_size)] + \
+           [("full", fulls[i:i + chunk_size]) for i in range(0, len(fulls), chunk_size)]
+    readjust = []
+    done = 0
+
+    def run(kind, chunk):
+        if kind == "tail":
+            last  = min(stored[t].index[-1] for t in chunk)
+            start = (last - timedelta(days=OVERLAP_DAYS)).date().isoformat()
+            frames = _download_chunk(chunk, retries, start=start)
+        else:
+            frames = _download_chunk(chunk, retries, period=STORE_PERIOD)
+        for t, df in frames.items():
+            with _lock_for(t):
+                old = stored[t] if kind == "tail" else pd.DataFrame()
+                df  = _localize_like(df, old)
+                merged = merge_tail(old, df)
+                if merged is None:
+                    readjust.append(t)
+                    continue
+                _write(t, merged)
+                if kind == "full":
+                    _mark_full(t, _period_days(STORE_PERIOD))
+                result[t] = merged
+        for t in chunk:
+            if t not in result and not stored[t].empty:
+                result[t] = stored[t]
+
+    for kind, chunk in jobs:
+        run(kind, chunk)
+        done += 1
+        if progress_cb:
+            progress_cb(done, len(jobs))
+
+    for i in range(0, len(readjust), chunk_size):
+        run("full", readjust[i:i + chunk_size])
+
+    return result
+
+
+# ──────────────────────────────────────────────────────────────
+#  DATA SESSION
+# ──────────────────────────────────────────────────────────────
+SESSION_DAYS = 1095 + 30         # widest consumer: VIX analysis, 3y lookback + margin
+
+
+class DataSession:
+    """
+    Fetch-once view of the store for one run.
+    Each ticker is loaded a single time with the widest window any consumer needs
+    (SESSION_DAYS); scan, backtest, VIX analysis and chart get positional slices
+    of that same frame instead of downloading their own window.
+    """
+
+    def __init__(self, min_days: int = SESSION_DAYS):
+        self.min_days = min_days
+        self._frames  = {}
+        self._lock    = threading.Lock()
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._frames
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def preload(self, tickers: list, chunk_size: int = BATCH_CHUNK_SIZE, progress_cb=None):
+        """Batch-fetch `tickers` and keep them in memory."""
+        missing = [t for t in tickers if t not in self._frames]
+        frames  = fetch_batch(missing, chunk_size=chunk_size, progress_cb=progress_cb)
+        with self._lock:
+            self._frames.update(frames)
+
+    def frame(self, ticker: str) -> pd.DataFrame:
+        """Full in-memory history of `ticker`, loading it on first use."""
+        df = self._frames.get(ticker)
+        if df is None:
+            try:
+                df = update_ticker(ticker, min_days=self.min_days)
+            except Exception:
+                df = pd.DataFrame()
+            with self._lock:
+                df = self._frames.setdefault(ticker, df)
+        return df
+
+    def get(self, ticker: str, period: str = "1y", start=None) -> pd.DataFrame:
+        """Same contract as get_ohlcv(), served from the session."""
+        return _slice(self.frame(ticker), _window_start(period, start))
@@ -0,0 +1,93 @@
+"""
+extrema_il.py — Linear-time local extrema index
+אינדקס קיצון מקומי — תמיכה/התנגדות ותבניות בזמן לינארי
+
+Logic:
+- sliding_max / sliding_min: van Herk / Gil-Werman — block prefix/suffix maxima,
+  O(n) for any window length, no Python loop over bars
+- A bar is a local high (low) when it equals the max (min) of the 2·window+1 bars
+  centred on it — same rule as the old per-bar .iloc loop, same results
+- ExtremaIndex is built once per ticker and shared by _support_resistance and
+  _chart_patterns (both read its NumPy arrays instead of pandas slices)
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _sliding(a: np.ndarray, window: int, fn, pad: float) -> np.ndarray:
+    """fn-reduce of every length-`window` run of `a` → len(a) - window + 1 values."""
+    n = len(a)
+    if window <= 0 or n < window:
+        return np.empty(0)
+    k   = -(-n // window)
+    buf = np.full(k * window, pad)
+    buf[:n] = a
+    blocks = buf.reshape(k, window)
+    prefix = fn.accumulate(blocks, axis=1).ravel()
+    suffix = fn.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    i = np.arange(n - window + 1)
+    return fn(suffix[i], prefix[i + window - 1])
+
+
+def sliding_max(a: np.ndarray, window: int) -> np.ndarray:
+    """Max of a[i:i+window] for every i (NaN-skipping like pandas)."""
+    a = np.where(np.isnan(a), -np.inf, a)
+    return _sliding(a, window, np.maximum, -np.inf)
+
+
+def sliding_min(a: np.ndarray, window: int) -> np.ndarray:
+    """Min of a[i:i+window] for every i (NaN-skipping like pandas)."""
+    a = np.where(np.isnan(a), np.inf, a)
+    return _sliding(a, window, np.minimum, np.inf)
+
+
+class ExtremaIndex:
+    """
+    Local highs/lows of one OHLC frame, found once and reused.
+    `window` = bars on each side of a pivot (8 for the TASE screener).
+    """
+
+    def __init__(self, df: pd.DataFrame, window: int = 8):
+        self.window = window
+        self.close  = df['Close'].to_numpy(dtype=float)
+        self.high   = df['High'].to_numpy(dtype=float) if 'High' in df.columns else self.close
+        self.low    = df['Low'].to_numpy(dtype=float)  if 'Low'  in df.columns else self.close
+
+        w, n = window, len(self.close)
+        if n > 2 * w:
+            centre = np.arange(w, n - w)
+            hi = self.high[centre] == sliding_max(self.high, 2 * w + 1)
+            lo = self.low[centre]  == sliding_min(self.low,  2 * w + 1)
+            self.high_idx = centre[hi]
+            self.low_idx  = centre[lo]
+        else:
+            self.high_idx = np.empty(0, dtype=int)
+            self.low_idx  = np.empty(0, dtype=int)
+
+    @property
+    def local_highs(self) -> np.ndarray:
+        return self.high[self.high_idx]
+
+    @property
+    def local_lows(self) -> np.ndarray:
+        return self.low[self.low_idx]
+
+
+def cluster_levels(levels: np.ndarray, pct: float = 0.025, min_size: int = 2) -> list:
+    """
+    Sort `levels`, start a new cluster wherever the gap to the previous level is
+    ≥ pct, and return the rounded mean of every cluster with ≥ min_size members.
+    """
+    levels = np.sort(np.asarray(levels, dtype=float))
+    if len(levels) == 0:
+        return []
+    prev = levels[:-1]
+    if np.any(prev == 0):
+        raise ZeroDivisionError("zero price level")
+    breaks = np.abs(levels[1:] - prev) / prev >= pct
+    starts = np.concatenate([[0], np.flatnonzero(breaks) + 1])
+    ends   = np.append(starts[1:], len(levels))
+    # np.mean per slice: same summation order (and same rounding on .xx5 ties) as the
+    # old per-cluster np.mean — a reduceat sum can land one ulp off and round the other way
+    return [round(np.mean(levels[s:e]), 2) for s, e in zip(starts, ends) if e - s >= min_size]
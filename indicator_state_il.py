@@ -0,0 +1,265 @@
+"""
+indicator_state_il.py — Incremental indicator state per ticker
+מצב אינדיקטורים מצטבר — עדכון יומי ב-O(1) לכל מניה
+
+Logic:
+- RSI (Wilder EWM) and MACD (EMA 12/26/9) are recursions → keep their accumulators
+- MA20/50/120/200, Bollinger and volume averages only need the last ≤ 200 values →
+  keep a buffer and re-sum the window when reading (no running sums, so float
+  error can't build up in a state that is carried forward for months)
+- The state is persisted to .cache/state/<ticker>.json and advanced only by the bars
+  that arrived since it was saved. It is saved through the second-to-last bar: the
+  last bar may still be moving intraday, so it is applied to a copy when reading.
+- If the stored history no longer matches (re-adjustment, parameter change, gap)
+  the state is rebuilt from the frame
+"""
+
+import copy
+import json
+import math
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+from data_store_il import CACHE_DIR, as_index_ts
+
+
+STATE_DIR     = os.path.join(CACHE_DIR, "state")
+STATE_VERSION = 2                # 2: window sums no longer stored
+MA_WINDOWS    = (20, 50, 120, 200)
+VOL_WINDOWS   = (20, 30)
+RSI_HISTORY   = 5                # RSI values kept for signal_fresh (RSI 4 bars back)
+
+_MEM  = {}
+_LOCK = threading.Lock()
+
+
+# ──────────────────────────────────────────────────────────────
+#  STATE
+# ──────────────────────────────────────────────────────────────
+def new_state(rsi_period: int = 14, bb_period: int = 20) -> dict:
+    return {
+        "version":    STATE_VERSION,
+        "rsi_period": rsi_period,
+        "bb_period":  bb_period,
+        "last_date":  None,
+        "last_close": None,
+        "bars":       0,
+        "rsi":        {"gain_num": 0.0, "loss_num": 0.0, "den": 0.0, "count": 0},
+        "rsi_hist":   [],
+        "macd":       {"fast": None, "slow": None, "signal": None},
+        "closes":     [],            # last max(MA_WINDOWS, bb_period) closes
+        "volumes":    [],            # last max(VOL_WINDOWS) volumes
+    }
+
+
+def advance(state: dict, date, close: float, volume: float = np.nan) -> dict:
+    """Advance `state` by one bar in place — O(1). Returns the state."""
+    close  = float(close)
+    volume = float(volume) if volume is not None else np.nan
+
+    # ── RSI (pandas ewm(com=p-1, adjust=True) as num/den) ──
+    p, r  = state["rsi_period"], state["rsi"]
+    decay = (p - 1) / p
+    prev  = state["last_close"]
+    r["gain_num"] *= decay
+    r["loss_num"] *= decay
+    r["den"]      *= decay
+    if prev is not None:
+        delta = close - prev
+        r["gain_num"] += max(delta, 0.0)
+        r["loss_num"] += max(-delta, 0.0)
+        r["den"]      += 1.0
+        r["count"]    += 1
+    rsi = np.nan
+    if r["count"] >= p and r["den"] > 0:
+        g, l = r["gain_num"] / r["den"], r["loss_num"] / r["den"]
+        rsi  = 100 - 100 / (1 + g / l) if l > 0 else (100.0 if g > 0 else np.nan)
+    state["rsi_hist"] = (state["rsi_hist"] + [rsi])[-RSI_HISTORY:]
+
+    # ── MACD (ewm(span, adjust=False)) ─────────────────────
+    m = state["macd"]
+    for key, span in (("fast", 12), ("slow", 26)):
+        a = 2.0 / (span + 1)
+        m[key] = close if m[key] is None else (1 - a) * m[key] + a * close
+    line = m["fast"] - m["slow"]
+    a = 2.0 / (9 + 1)
+    m["signal"] = line if m["signal"] is None else (1 - a) * m["signal"] + a * line
+
+    # ── window buffers ─────────────────────────────────────
+    state["closes"].append(close)
+    del state["closes"][:-max(max(MA_WINDOWS), state["bb_period"])]
+    state["volumes"].append(volume)
+    del state["volumes"][:-max(VOL_WINDOWS)]
+
+    state["last_close"] = close
+    state["last_date"]  = pd.Timestamp(date).isoformat()
+    state["bars"]      += 1
+    return state
+
+
+def build_state(df: pd.DataFrame, rsi_period: int = 14, bb_period: int = 20) -> dict:
+    """State after every bar of `df`."""
+    state = new_state(rsi_period, bb_period)
+    vols  = df['Volume'].to_numpy(dtype=float) if 'Volume' in df.columns else np.full(len(df), np.nan)
+    for date, c, v in zip(df.index, df['Close'].to_numpy(dtype=float), vols):
+        advance(state, date, c, v)
+    return state
+
+
+# ──────────────────────────────────────────────────────────────
+#  READ
+# ──────────────────────────────────────────────────────────────
+def _window(buf: list, w: int, n_seen: int):
+    """Last `w` values, or None if fewer were seen or one is NaN (pandas min_periods=w)."""
+    if n_seen < w or len(buf) < w:
+        return None
+    vals = buf[-w:]
+    return None if any(np.isnan(vals)) else vals
+
+
+def _mean(buf: list, w: int, n_seen: int) -> float:
+    vals = _window(buf, w, n_seen)
+    return np.nan if vals is None else math.fsum(vals) / w
+
+
+def _std(buf: list, w: int, n_seen: int) -> float:
+    vals = _window(buf, w, n_seen)
+    if vals is None or w < 2:
+        return np.nan
+    mean = math.fsum(vals) / w
+    return math.sqrt(math.fsum((x - mean) ** 2 for x in vals) / (w - 1))
+
+
+def read_indicators(state: dict, bb_std: float = 2.0, bars: int = None) -> dict:
+    """
+    Indicator values at the state's last bar, with the same fallbacks and rounding as
+    screener_il (_rsi, _bb, _macd, the rolling MAs, the 20-day volume filter and
+    _volume_spike). `bars` = length of the window the screener is looking at.
+    """
+    n     = state["bars"] if bars is None else bars
+    seen  = state["bars"]
+    price = state["last_close"]
+    p     = state["rsi_period"]
+    out   = {}
+
+    rsi = state["rsi_hist"][-1] if state["rsi_hist"] else np.nan
+    out["rsi"] = 50.0 if n < p * 2 or np.isnan(rsi) else round(float(rsi), 1)
+    hist = state["rsi_hist"]
+    out["rsi_prev5"] = float(hist[-RSI_HISTORY]) if n > 5 and len(hist) >= RSI_HISTORY else np.nan
+
+    closes, volumes = state["closes"], state["volumes"]
+    for w in MA_WINDOWS:
+        v = _mean(closes, w, seen)
+        out[f"ma{w}"] = round(float(v), 2) if n >= w else None
+
+    bp = state["bb_period"]
+    if n < bp + 2:
+        out["bb_pct"], out["bb_upper"], out["bb_lower"] = 0.5, None, None
+    else:
+        mid, sigma = _mean(closes, bp, seen), _std(closes, bp, seen)
+        upper, lower = mid + bb_std * sigma, mid - bb_std * sigma
+        pct = (price - lower) / (upper - lower) if upper != lower else np.nan
+        out["bb_pct"]   = round(pct, 3)   if not np.isnan(pct)   else 0.5
+        out["bb_upper"] = round(upper, 2) if not np.isnan(upper) else None
+        out["bb_lower"] = round(lower, 2) if not np.isnan(lower) else None
+
+    m = state["macd"]
+    if n < 26 + 9 + 5 or m["signal"] is None:
+        out["macd_line"] = out["macd_signal"] = out["macd_hist"] = 0.0
+    else:
+        line = m["fast"] - m["slow"]
+        out["macd_line"]   = round(float(line), 4)
+        out["macd_signal"] = round(float(m["signal"]), 4)
+        out["macd_hist"]   = round(float(line - m["signal"]), 4)
+
+    avg20 = _mean(volumes, 20, seen)
+    out["avg_volume"] = float(avg20) if n >= 20 else 0
+    avg30 = _mean(volumes, 30, seen)
+    today = volumes[-1] if volumes else np.nan
+    if avg30 <= 0:
+        out["volume_ratio"], out["volume_spike"] = 1.0, False
+    else:
+        ratio = round(today / avg30, 2)
+        out["volume_ratio"], out["volume_spike"] = ratio, ratio >= 2.0
+    return out
+
+
+# ──────────────────────────────────────────────────────────────
+#  PERSISTENCE
+# ──────────────────────────────────────────────────────────────
+def _path(ticker: str) -> str:
+    safe = "".join(ch if ch.isalnum() or ch in "._-" else "_" for ch in ticker)
+    return os.path.join(STATE_DIR, f"{safe}.json")
+
+
+def load_state(ticker: str):
+    with _LOCK:
+        if ticker in _MEM:
+            return _MEM[ticker]
+    try:
+        with open(_path(ticker), encoding="utf-8") as f:
+            state = json.load(f)
+    except Exception:
+        return None
+    with _LOCK:
+        _MEM[ticker] = state
+    return state
+
+
+def save_state(ticker: str, state: dict):
+    with _LOCK:
+        _MEM[ticker] = state
+    try:
+        os.makedirs(STATE_DIR, exist_ok=True)
+        tmp = f"{_path(ticker)}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, allow_nan=True)
+        os.replace(tmp, _path(ticker))
+    except Exception:
+        pass
+
+
+def _matches(state: dict, df: pd.DataFrame, rsi_period: int, bb_period: int):
+    """Position in df of the state's last bar, or None if the state can't be reused."""
+    if not state or state.get("version") != STATE_VERSION:
+        return None
+    if state["rsi_period"] != rsi_period or state["bb_period"] != bb_period:
+        return None
+    if state["last_date"] is None:
+        return None
+    ts  = as_index_ts(state["last_date"], df.index)
+    pos = df.index.searchsorted(ts)
+    if pos >= len(df) or df.index[pos] != ts:
+        return None
+    if abs(float(df['Close'].iloc[pos]) - state["last_close"]) > 1e-9 * abs(state["last_close"]):
+        return None                                   # history re-adjusted
+    return pos
+
+
+def sync_state(ticker: str, df: pd.DataFrame, rsi_period: int = 14, bb_period: int = 20) -> dict:
+    """
+    State of `ticker` at the last bar of `df`.
+    Reuses the persisted state and advances it by the new bars only; rebuilds from
+    `df` when that isn't possible. The persisted copy stops one bar short (see top).
+    """
+    if df is None or len(df) < 2:
+        return build_state(df if df is not None else pd.DataFrame(columns=['Close']),
+                           rsi_period, bb_period)
+    state = load_state(ticker)
+    pos   = _matches(state, df, rsi_period, bb_period)
+    if pos is None or pos > len(df) - 2:
+        state = build_state(df.iloc[:-1], rsi_period, bb_period)
+    else:
+        state = copy.deepcopy(state)
+        vols  = df['Volume'] if 'Volume' in df.columns else None
+        for i in range(pos + 1, len(df) - 1):
+            advance(state, df.index[i], df['Close'].iloc[i],
+                    vols.iloc[i] if vols is not None else np.nan)
+    save_state(ticker, state)
+
+    current = copy.deepcopy(state)
+    advance(current, df.index[-1], df['Close'].iloc[-1],
+            df['Volume'].iloc[-1] if 'Volume' in df.columns else np.nan)
+    return current
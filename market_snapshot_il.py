@@ -0,0 +1,90 @@
+"""
+market_snapshot_il.py — Market bar quotes kept warm in the background
+תמונת שוק — TA-35, TA-125, VIX, דולר/שקל ברענון רקע
+
+Logic:
+- All market-bar symbols come from ONE batched yf.download (data_store_il.fetch_quotes)
+- A daemon thread refreshes the shared snapshot every REFRESH_SECONDS
+- Merged per label: a symbol that fails in one refresh keeps its last good quote
+- Readers (render_market_bar) only copy the last snapshot from memory — a page
+  render never waits on the network; before the first refresh lands the tiles
+  show zeros ("No data")
+- The app creates one MarketSnapshot per server process (st.cache_resource)
+"""
+
+import threading
+import time
+
+from data_store_il import fetch_quotes
+
+
+MARKET_SYMBOLS  = {"^TA35.TA": "TA-35", "^TA125.TA": "TA-125", "^VIX": "VIX (US)", "USDILS=X": "USD/ILS"}
+REFRESH_SECONDS = 180
+
+
+def fetch_market_quotes(symbols: dict = None) -> dict:
+    """{label: {"value", "change_pct"}} from one batched request (last two daily closes)."""
+    symbols = symbols or MARKET_SYMBOLS
+    try:
+        frames = fetch_quotes(list(symbols), period="5d", retries=1)
+    except Exception:
+        frames = {}
+    result = {}
+    for sym, label in symbols.items():
+        try:
+            close = frames[sym]['Close'].dropna()
+            if len(close) >= 2:
+                prev = float(close.iloc[-2]); curr = float(close.iloc[-1])
+                chg  = (curr - prev) / prev * 100
+            elif len(close) == 1:
+                curr = float(close.iloc[-1]); chg = 0
+            else:
+                curr = chg = 0
+            result[label] = {"value": curr, "change_pct": chg}
+        except Exception:
+            result[label] = {"value": 0, "change_pct": 0}
+    return result
+
+
+class MarketSnapshot:
+    """Shared, background-refreshed market quotes."""
+
+    def __init__(self, symbols: dict = None, interval: float = REFRESH_SECONDS):
+        self.symbols    = symbols or MARKET_SYMBOLS
+        self.interval   = interval
+        self.updated_at = 0.0
+        self._data      = {label: {"value": 0, "change_pct": 0} for label in self.symbols.values()}
+        self._lock      = threading.Lock()
+        self._stop      = threading.Event()
+        self._thread    = None
+
+    def refresh(self):
+        data = fetch_market_quotes(self.symbols)
+        fresh = {label: d for label, d in data.items() if d["value"]}   # failed symbols come back as 0
+        if fresh:                                        # ...and keep their last good quote
+            with self._lock:
+                self._data = {**self._data, **fresh}
+                self.updated_at = time.time()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                pass
+            self._stop.wait(self.interval)
+
+    def start(self) -> "MarketSnapshot":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="market-snapshot", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def get(self) -> dict:
+        """Copy of the latest snapshot — memory only."""
+        with self._lock:
+            return {k: dict(v) for k, v in self._data.items()}
@@ -0,0 +1,125 @@
+"""
+metadata_cache_il.py — Disk cache for company name / market cap
+מטמון שמות חברות ושווי שוק
+
+Logic:
+- yf.Ticker(t).info (name) and .fast_info (market cap) are slow and rate-limited
+- Values change rarely → kept in .cache/metadata.json with a TTL (default 7 days)
+- The screener only reads the cache; prefetch_metadata() refreshes stale entries
+  concurrently for a list of tickers (survivors of a scan or the whole universe)
+"""
+
+import json
+import os
+import threading
+import time
+import yfinance as yf
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from data_store_il import CACHE_DIR
+
+
+METADATA_PATH = os.path.join(CACHE_DIR, "metadata.json")
+METADATA_TTL  = 7 * 24 * 3600
+
+_CACHE = None
+_LOCK  = threading.Lock()
+
+
+def _load() -> dict:
+    global _CACHE
+    if _CACHE is None:
+        try:
+            with open(METADATA_PATH, encoding="utf-8") as f:
+                _CACHE = json.load(f)
+        except Exception:
+            _CACHE = {}
+    return _CACHE
+
+
+def _save():
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = METADATA_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(_CACHE, f, ensure_ascii=False)
+    os.replace(tmp, METADATA_PATH)
+
+
+def get_cached_metadata(ticker: str, ttl: float = None) -> dict:
+    """
+    Cached {'name', 'market_cap_m', 'fetched_at'} for `ticker`, or None.
+    No network. With `ttl`, entries older than ttl seconds count as missing.
+    """
+    with _LOCK:
+        meta = _load().get(ticker)
+    if meta and ttl is not None and time.time() - meta.get('fetched_at', 0) > ttl:
+        return None
+    return meta
+
+
+def fetch_metadata(ticker: str) -> dict:
+    """Network lookup of name + market cap (₪ millions). Missing values stay None."""
+    name, market_cap = None, None
+    t = yf.Ticker(ticker)
+    try:
+        info = t.info
+        name = info.get('longName') or info.get('shortName')
+    except Exception:
+        pass
+    try:
+        mc = getattr(t.fast_info, 'market_cap', None)
+        if mc:
+            market_cap = round(mc / 1_000_000, 0)   # במיליוני ₪
+    except Exception:
+        pass
+    return {"name": name, "market_cap_m": market_cap, "fetched_at": time.time()}
+
+
+def prefetch_metadata(tickers: list, ttl: float = METADATA_TTL,
+                      max_workers: int = 8, progress_cb=None) -> int:
+    """
+    Refresh entries older than `ttl` for `tickers` (e.g. STOCK_UNIVERSE_IL).
+    Returns the number of tickers fetched from the network.
+    """
+    stale = [t for t in dict.fromkeys(tickers) if get_cached_metadata(t, ttl) is None]
+    if not stale:
+        return 0
+    done = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        futures = {ex.submit(fetch_metadata, t): t for t in stale}
+        for fut in as_completed(futures):
+            done += 1
+            if progress_cb:
+                progress_cb(done, len(stale))
+            try:
+                meta = fut.result()
+            except Exception:
+                continue
+            with _LOCK:
+                cache = _load()
+                old   = cache.get(futures[fut], {})
+                # keep the previous value when a lookup fails this time
+                cache[futures[fut]] = {
+                    "name":         meta['name'] or old.get('name'),
+                    "market_cap_m": meta['market_cap_m'] or old.get('market_cap_m'),
+                    "fetched_at":   meta['fetched_at'],
+                }
+    with _LOCK:
+        try:
+            _save()
+        except Exception:
+            pass
+    return len(stale)
+
+
+def apply_metadata(results: list) -> list:
+    """Fill 'name' / 'market_cap_m' of screener results from the cache (in place)."""
+    for r in results:
+        meta = get_cached_metadata(r['ticker'])
+        if not meta:
+            continue
+        if meta.get('name'):
+            r['name'] = meta['name']
+        if meta.get('market_cap_m'):
+            r['market_cap_m'] = meta['market_cap_m']
+    return results
@@ -1,80 +1,188 @@
 """
 news_fetcher_il.py — חדשות למניות ישראליות
+
+Logic:
+- t.news per symbol, cached in memory with a TTL (NEWS_TTL) — one fetch per symbol
+  at a time (per-symbol lock), later callers read the cache. A failed fetch is cached
+  as "no news" for NEWS_FAIL_TTL, so readers don't wait on it forever
+- Market news: all source symbols fetched concurrently, headlines deduped across
+  symbols by a hash of the normalized title
+- prefetch_news_il(): fetch news for the scan survivors in a background thread;
+  cached_news_il() reads the cache only, so the News tab never waits on the network;
+  cached_market_news_il() shows whichever market sources are already cached
 """
 
+import hashlib
+import re
+import threading
+import time
 import yfinance as yf
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+
+NEWS_TTL      = 15 * 60          # seconds
+NEWS_FAIL_TTL = 60               # seconds a failed fetch counts as "no news"
+NEWS_WORKERS  = 6
+MARKET_SOURCES = ["^TA125.TA", "^TA35.TA", "TEVA.TA", "ICL.TA", "ESLT.TA", "BEZQ.TA"]
+
+_CACHE     = {}                  # symbol → (fetched_at, raw items, ok)
+_LOCK      = threading.Lock()
+_SYM_LOCKS = {}
+_INFLIGHT  = set()               # symbols a prefetch thread is fetching
+
+
+# ──────────────────────────────────────────────────────────────
+#  CACHE
+# ──────────────────────────────────────────────────────────────
+def _sym_lock(sym: str) -> threading.Lock:
+    with _LOCK:
+        return _SYM_LOCKS.setdefault(sym, threading.Lock())
+
+
+def _cached(sym: str, ttl: float):
+    with _LOCK:
+        hit = _CACHE.get(sym)
+    if hit and time.time() - hit[0] < (ttl if hit[2] else min(ttl, NEWS_FAIL_TTL)):
+        return hit[1]
+    return None
+
+
+def _raw_news(sym: str, ttl: float = NEWS_TTL) -> list:
+    """t.news for `sym` — from the cache when fresh, else fetched (once at a time per symbol)."""
+    items = _cached(sym, ttl)
+    if items is not None:
+        return items
+    with _sym_lock(sym):
+        items = _cached(sym, ttl)                     # fetched while we waited
+        if items is not None:
+            return items
+        try:
+            items, ok = yf.Ticker(sym).news or [], True
+        except Exception:
+            items, ok = [], False
+        with _LOCK:
+            _CACHE[sym] = (time.time(), items, ok)
+        return items
+
+
+def clear_news_cache():
+    with _LOCK:
+        _CACHE.clear()
+
+
+def title_key(title: str) -> str:
+    """Hash of the normalized title — same headline from two symbols → same key."""
+    norm = re.sub(r"[^\w\s]", "", title.lower())
+    norm = re.sub(r"\s+", " ", norm).strip()
+    return hashlib.sha1(norm.encode("utf-8")).hexdigest()
+
+
+# ──────────────────────────────────────────────────────────────
+#  PARSING
+# ──────────────────────────────────────────────────────────────
+def _parse_item(item: dict, time_fmt: str = '%d/%m/%Y %H:%M') -> dict:
+    title     = (item.get('title') or
+                 item.get('content', {}).get('title', ''))
+    url       = (item.get('link') or item.get('url') or
+                 item.get('content', {}).get('url', ''))
+    publisher = (item.get('publisher') or
+                 item.get('source', {}).get('displayName', ''))
+    pub_time  = item.get('providerPublishTime') or item.get('pubDate', '')
+    if isinstance(pub_time, int):
+        try:
+            pub_str = datetime.fromtimestamp(pub_time).strftime(time_fmt)
+        except Exception:
+            pub_str = str(pub_time)
+    else:
+        pub_str = str(pub_time)[:16] if pub_time else ''
+    return {
+        'title':     title,
+        'url':       url,
+        'publisher': publisher,
+        'published': pub_str,
+    }
+
 
+def _parse_news(items: list, limit: int = 10) -> list:
+    result, seen = [], set()
+    for item in items[:limit]:
+        h = _parse_item(item)
+        if h['title'] and title_key(h['title']) not in seen:
+            seen.add(title_key(h['title']))
+            result.append(h)
+    return result
 
-def fetch_news_il(ticker: str) -> list:
+
+# ──────────────────────────────────────────────────────────────
+#  PUBLIC
+# ──────────────────────────────────────────────────────────────
+def fetch_news_il(ticker: str, ttl: float = NEWS_TTL) -> list:
     """
-    מושך חדשות למניה ישראלית דרך yfinance.
+    מושך חדשות למניה ישראלית דרך yfinance (cached for `ttl` seconds).
     """
     try:
-        t    = yf.Ticker(ticker)
-        news = t.news
-        if not news:
-            return []
-
-        result = []
-        for item in news[:10]:
-            title     = (item.get('title') or
-                         item.get('content', {}).get('title', ''))
-            url       = (item.get('link') or item.get('url') or
-                         item.get('content', {}).get('url', ''))
-            publisher = (item.get('publisher') or
-                         item.get('source', {}).get('displayName', ''))
-            pub_time  = item.get('providerPublishTime') or item.get('pubDate', '')
-            if isinstance(pub_time, int):
-                try:
-                    pub_str = datetime.fromtimestamp(pub_time).strftime('%d/%m/%Y %H:%M')
-                except Exception:
-                    pub_str = str(pub_time)
-            else:
-                pub_str = str(pub_time)[:16] if pub_time else ''
-
-            if title:
-                result.append({
-                    'title':     title,
-                    'url':       url,
-                    'publisher': publisher,
-                    'published': pub_str,
-                })
-        return result
+        return _parse_news(_raw_news(ticker, ttl))
     except Exception:
         return []
 
 
-def fetch_market_news_il() -> list:
+def cached_news_il(ticker: str, ttl: float = NEWS_TTL):
+    """News for `ticker` if it is already cached, else None — never touches the network."""
+    items = _cached(ticker, ttl)
+    return None if items is None else _parse_news(items)
+
+
+def fetch_market_news_il(ttl: float = NEWS_TTL) -> list:
     """
     חדשות שוק כלליות — ת"א 35, ת"א 125.
     """
-    headlines = []
-    seen = set()
-    sources = ["^TA125.TA", "^TA35.TA", "TEVA.TA", "ICL.TA", "ESLT.TA", "BEZQ.TA"]
-    for sym in sources:
-        try:
-            t    = yf.Ticker(sym)
-            news = t.news or []
-            for item in news[:6]:
-                title = (item.get('title') or
-                         item.get('content', {}).get('title', ''))
-                if not title or title in seen:
-                    continue
-                seen.add(title)
-                pub_time = item.get('providerPublishTime') or 0
-                try:
-                    pub_str = datetime.fromtimestamp(pub_time).strftime('%d/%m %H:%M')
-                except Exception:
-                    pub_str = ''
-                url = (item.get('link') or item.get('url') or
-                       item.get('content', {}).get('url', ''))
-                headlines.append({
-                    'title':     title,
-                    'publisher': item.get('publisher', ''),
-                    'published': pub_str,
-                    'url':       url,
-                })
-        except Exception:
-            pass
+    with ThreadPoolExecutor(max_workers=NEWS_WORKERS) as ex:
+        per_sym = list(ex.map(lambda s: _raw_news(s, ttl), MARKET_SOURCES))
+    return _market_headlines(per_sym)
+
+
+def _market_headlines(per_sym: list) -> list:
+    headlines, seen = [], set()
+    for items in per_sym:
+        for item in items[:6]:
+            h = _parse_item(item, '%d/%m %H:%M')
+            key = title_key(h['title']) if h['title'] else None
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            headlines.append(h)
     return headlines[:30]
+
+
+def cached_market_news_il(ttl: float = NEWS_TTL):
+    """Market headlines from the sources already cached; None if none is cached yet."""
+    per_sym = [_cached(s, ttl) for s in MARKET_SOURCES]
+    if all(items is None for items in per_sym):
+        return None
+    return _market_headlines([items for items in per_sym if items is not None])
+
+
+def prefetch_news_il(tickers: list, ttl: float = NEWS_TTL,
+                     include_market: bool = True) -> threading.Thread:
+    """Warm the cache for `tickers` (and the market sources) in a background thread."""
+    syms = list(dict.fromkeys(list(tickers) + (MARKET_SOURCES if include_market else [])))
+    syms = [s for s in syms if _cached(s, ttl) is None]
+    with _LOCK:                                    # skip symbols an earlier prefetch is fetching
+        syms = [s for s in syms if s not in _INFLIGHT]
+        _INFLIGHT.update(syms)
+
+    def fetch(sym):
+        try:
+            _raw_news(sym, ttl)
+        finally:
+            with _LOCK:
+                _INFLIGHT.discard(sym)
+
+    def run():
+        with ThreadPoolExecutor(max_workers=NEWS_WORKERS) as ex:
+            list(ex.map(fetch, syms))
+
+    th = threading.Thread(target=run, name="news-prefetch", daemon=True)
+    th.start()
+    return th
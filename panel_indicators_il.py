@@ -0,0 +1,244 @@
+"""
+panel_indicators_il.py — Vectorized indicator engine for a whole universe
+מנוע אינדיקטורים וקטורי — כל המניות במטריצה אחת
+
+Logic:
+- build_panel() stacks every ticker's own bars into one (bars × tickers) NumPy matrix.
+  Rows are bottom-aligned: the last row is each ticker's last bar and shorter histories
+  are padded with NaN on top — exactly the window the per-ticker functions see.
+- RSI / MACD are EWM recursions → one pass over the rows, vectorized across tickers
+- MAs, Bollinger and volume averages use pandas' own online rolling sum (Kahan
+  compensated), replayed across columns → the same bits, so half-cent ties round alike
+- compute_panel_indicators() returns the same values (and the same fallbacks / rounding)
+  as screener_il._rsi, _bb, _macd, _trend_pct, the rolling MAs and _volume_spike
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# ──────────────────────────────────────────────────────────────
+#  PANEL
+# ──────────────────────────────────────────────────────────────
+def build_panel(frames: dict, column: str = 'Close') -> tuple:
+    """
+    {ticker: OHLCV frame} → (tickers, matrix) with matrix shape (max_bars, n_tickers).
+    Each column holds that ticker's bars, last bar in the last row, NaN-padded on top.
+    """
+    tickers = [t for t, df in frames.items()
+               if df is not None and not df.empty and column in df.columns]
+    n_rows  = max((len(frames[t]) for t in tickers), default=0)
+    mat     = np.full((n_rows, len(tickers)), np.nan)
+    for j, t in enumerate(tickers):
+        v = frames[t][column].to_numpy(dtype=float)
+        mat[n_rows - len(v):, j] = v
+    return tickers, mat
+
+
+def _lengths(x: np.ndarray) -> np.ndarray:
+    """Bars per column (bottom-aligned panel → count of non-NaN rows)."""
+    return (~np.isnan(x)).sum(axis=0)
+
+
+# ──────────────────────────────────────────────────────────────
+#  ARRAY PRIMITIVES  (axis 0 = time)
+# ──────────────────────────────────────────────────────────────
+def diff(x: np.ndarray) -> np.ndarray:
+    out = np.full_like(x, np.nan)
+    out[1:] = x[1:] - x[:-1]
+    return out
+
+
+def rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    """
+    pandas .rolling(window).mean(), bit for bit: the same online window sum with Kahan
+    compensation (separate for adds and removes), the run-of-equal-values shortcut and
+    the sign clamp — one pass over the rows, vectorized across columns. An exact or
+    cumsum-difference sum lands an ulp away on some half-cent means and rounds the
+    other way from the screener.
+    """
+    n_cols   = x.shape[1]
+    out      = np.full_like(x, np.nan)
+    total    = np.zeros(n_cols)
+    comp_add = np.zeros(n_cols)
+    comp_rem = np.zeros(n_cols)
+    nobs     = np.zeros(n_cols, dtype=np.int64)
+    neg      = np.zeros(n_cols, dtype=np.int64)
+    same     = np.zeros(n_cols, dtype=np.int64)
+    prev     = x[0].copy() if len(x) else np.zeros(n_cols)
+    for t in range(len(x)):
+        if t >= window:                                   # value leaving the window
+            v  = x[t - window]
+            ok = ~np.isnan(v)
+            y  = np.where(ok, -v - comp_rem, 0.0)
+            s  = total + y
+            comp_rem = np.where(ok, s - total - y, comp_rem)
+            total    = np.where(ok, s, total)
+            nobs    -= ok
+            neg     -= ok & np.signbit(v)
+        v  = x[t]                                         # value entering the window
+        ok = ~np.isnan(v)
+        y  = np.where(ok, v - comp_add, 0.0)
+        s  = total + y
+        comp_add = np.where(ok, s - total - y, comp_add)
+        total    = np.where(ok, s, total)
+        nobs    += ok
+        neg     += ok & np.signbit(v)
+        same     = np.where(ok, np.where(v == prev, same + 1, 1), same)
+        prev     = np.where(ok, v, prev)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            m = np.where(same >= nobs, prev, total / nobs)
+        m = np.where((neg == 0) & (m < 0), 0.0, np.where((neg == nobs) & (m > 0), 0.0, m))
+        out[t] = np.where(nobs >= window, m, np.nan)
+    return out
+
+
+def rolling_std(x: np.ndarray, window: int) -> np.ndarray:
+    """pandas .rolling(window).std() (ddof=1), computed around each column's last value."""
+    shift = np.where(np.isnan(x[-1]), 0.0, x[-1]) if len(x) else 0.0
+    y     = x - shift                     # centring keeps the sum-of-squares well conditioned
+    m1    = rolling_mean(y, window)
+    m2    = rolling_mean(y * y, window)
+    var   = (m2 - m1 * m1) * window / (window - 1)
+    return np.sqrt(np.clip(var, 0.0, None))
+
+
+def ewm_mean_adjusted(x: np.ndarray, com: float, min_periods: int = 0) -> np.ndarray:
+    """pandas .ewm(com=com, min_periods=min_periods).mean() (adjust=True)."""
+    decay = com / (1.0 + com)
+    num   = np.zeros(x.shape[1])
+    den   = np.zeros(x.shape[1])
+    cnt   = np.zeros(x.shape[1])
+    out   = np.full_like(x, np.nan)
+    for t in range(len(x)):
+        v     = ~np.isnan(x[t])
+        num   = num * decay + np.where(v, x[t], 0.0)
+        den   = den * decay + v
+        cnt  += v
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out[t] = np.where((cnt >= max(min_periods, 1)) & (den > 0), num / den, np.nan)
+    return out
+
+
+def ewm_mean_span(x: np.ndarray, span: int) -> np.ndarray:
+    """pandas .ewm(span=span, adjust=False).mean() — starts at each column's first value."""
+    alpha = 2.0 / (span + 1.0)
+    out   = np.full_like(x, np.nan)
+    prev  = np.full(x.shape[1], np.nan)
+    for t in range(len(x)):
+        v    = ~np.isnan(x[t])
+        prev = np.where(v, np.where(np.isnan(prev), x[t], (1 - alpha) * prev + alpha * x[t]), prev)
+        out[t] = np.where(np.isnan(prev), np.nan, prev)
+    return out
+
+
+# ──────────────────────────────────────────────────────────────
+#  INDICATORS
+# ──────────────────────────────────────────────────────────────
+def rsi_panel(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Full RSI series per column (same recursion as screener_il._rsi)."""
+    delta = diff(close)
+    with np.errstate(invalid='ignore'):
+        gain = np.where(np.isnan(delta), np.nan, np.clip(delta, 0, None))
+        loss = np.where(np.isnan(delta), np.nan, -np.clip(delta, None, 0))
+    avg_gain = ewm_mean_adjusted(gain, period - 1, period)
+    avg_loss = ewm_mean_adjusted(loss, period - 1, period)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+def bb_panel(close: np.ndarray, period: int = 20, std_dev: float = 2.0) -> tuple:
+    """(pct_b, upper, lower) series per column."""
+    mid   = rolling_mean(close, period)
+    sigma = rolling_std(close, period)
+    upper = mid + std_dev * sigma
+    lower = mid - std_dev * sigma
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pct = (close - lower) / (upper - lower)
+    return pct, upper, lower
+
+
+def macd_panel(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> tuple:
+    """(macd_line, signal_line, hist) series per column."""
+    macd_line   = ewm_mean_span(close, fast) - ewm_mean_span(close, slow)
+    signal_line = ewm_mean_span(macd_line, signal)
+    return macd_line, signal_line, macd_line - signal_line
+
+
+def _round(v: np.ndarray, nd: int) -> np.ndarray:
+    """Python round() per value — np.round differs from it on some ties (2.675 → 2.67 vs 2.68)."""
+    return np.array([round(float(x), nd) if np.isfinite(x) else x for x in np.atleast_1d(v)])
+
+
+def compute_panel_indicators(frames: dict, params: dict = None) -> pd.DataFrame:
+    """
+    Last-bar indicators for every ticker in `frames` ({ticker: OHLCV frame}).
+    Pass the same frames the screener would see (e.g. the 2y window) — EWM values
+    depend on where the history starts.
+
+    Columns follow calculate_indicators_il's result keys: price, rsi, ma20/50/120/200,
+    bb_pct, bb_upper, bb_lower, macd_line, macd_signal, macd_hist, trend_4w,
+    avg_volume, volume_ratio, volume_spike — plus bars and rsi_prev5 (RSI 4 bars
+    back, used for signal_fresh). Missing values (e.g. MA200 on a short history) are NaN.
+    """
+    params  = params or {}
+    rsi_p   = params.get('rsi_period', 14)
+    bb_p    = params.get('bb_period', 20)
+    bb_std  = params.get('bb_std', 2.0)
+
+    tickers, close = build_panel(frames, 'Close')
+    if not tickers:
+        return pd.DataFrame()
+    vol_frames = {t: (frames[t] if 'Volume' in frames[t].columns
+                      else frames[t].assign(Volume=np.nan)) for t in tickers}
+    _, volume  = build_panel(vol_frames, 'Volume')
+    n     = _lengths(close)
+    last  = close[-1]
+    out   = {"bars": n, "price": _round(last, 2)}
+
+    # ── RSI ─────────────────────────────────────────────────
+    rsi_ser = rsi_panel(close, rsi_p)
+    rsi     = np.where(np.isnan(rsi_ser[-1]), 50.0, _round(rsi_ser[-1], 1))
+    out["rsi"]       = np.where(n < rsi_p * 2, 50.0, rsi)
+    out["rsi_prev5"] = rsi_ser[-5] if len(rsi_ser) >= 5 else np.full(len(tickers), np.nan)
+    out["rsi_prev5"] = np.where(n > 5, out["rsi_prev5"], np.nan)
+
+    # ── MAs ─────────────────────────────────────────────────
+    for w in (20, 50, 120, 200):
+        out[f"ma{w}"] = np.where(n >= w, _round(rolling_mean(close, w)[-1], 2), np.nan)
+
+    # ── Bollinger ───────────────────────────────────────────
+    pct, upper, lower = bb_panel(close, bb_p, bb_std)
+    short = n < bb_p + 2
+    out["bb_pct"]   = np.where(short | np.isnan(pct[-1]), 0.5, _round(pct[-1], 3))
+    out["bb_upper"] = np.where(short, np.nan, _round(upper[-1], 2))
+    out["bb_lower"] = np.where(short, np.nan, _round(lower[-1], 2))
+
+    # ── MACD ────────────────────────────────────────────────
+    line, sig, hist = macd_panel(close)
+    short = n < 26 + 9 + 5
+    out["macd_line"]   = np.where(short, 0.0, _round(line[-1], 4))
+    out["macd_signal"] = np.where(short, 0.0, _round(sig[-1], 4))
+    out["macd_hist"]   = np.where(short, 0.0, _round(hist[-1], 4))
+
+    # ── 4-week trend ────────────────────────────────────────
+    days = 20
+    if len(close) >= days + 1:
+        start = close[-days - 1]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            trend = _round((last - start) / start * 100, 2)
+        out["trend_4w"] = np.where((n >= days + 2) & (start > 0), trend, 0.0)
+    else:
+        out["trend_4w"] = np.zeros(len(tickers))
+
+    # ── Volume ──────────────────────────────────────────────
+    avg20 = rolling_mean(volume, 20)[-1]
+    out["avg_volume"] = np.where(n >= 20, avg20, 0.0)
+    avg30 = rolling_mean(volume, 30)[-1]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio = _round(volume[-1] / avg30, 2)
+    ratio = np.where(avg30 <= 0, 1.0, ratio)
+    out["volume_ratio"] = ratio
+    out["volume_spike"] = np.where(avg30 <= 0, False, ratio >= 2.0)
+
+    return pd.DataFrame(out, index=pd.Index(tickers, name="ticker"))
@@ -0,0 +1,154 @@
+"""
+portfolio_sim_il.py — Portfolio-level backtest for the TASE scanner
+סימולציית תיק — הון התחלתי, מגבלת פוזיציות ועקומת הון יומית
+
+Logic:
+- Same buy/sell signals as the backtester (SignalPanel.signals), on one date axis
+- Account starts with `capital` in cash and holds at most `max_positions` names
+- Each day, vectorized across tickers:
+    1. exits: held + sell signal → sell at the close (losing exit → cooldown, like the backtester)
+    2. entries: free slots are filled by the buy candidates with the highest rank —
+       a ticker sold on this bar isn't bought back on it (the backtester can't either)
+       (screener score if given, otherwise lowest RSI); each new position gets
+       equity / max_positions, capped by the cash left
+    3. equity = cash + shares × last known close
+- Only the day loop is in Python; every step inside it works on whole ticker vectors
+"""
+
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+
+from backtester_il import load_signal_panel, COOLDOWN_DAYS
+
+
+PORTFOLIO_CAPITAL   = 100_000.0   # ₪
+PORTFOLIO_POSITIONS = 10
+PORTFOLIO_FEE_PCT   = 0.1         # % per side (TASE broker commission)
+
+
+def _rank_matrix(panel, params: dict, scores: dict = None) -> np.ndarray:
+    """(days × tickers) ranking — higher is better."""
+    if scores:
+        row = np.array([float(scores.get(t, -np.inf)) for t in panel.tickers])
+        return np.broadcast_to(row, panel.close.shape)
+    return -panel.rsi(params.get('rsi_period', 14))
+
+
+def simulate_portfolio(panel, params: dict, capital: float = PORTFOLIO_CAPITAL,
+                       max_positions: int = PORTFOLIO_POSITIONS, scores: dict = None,
+                       fee_pct: float = PORTFOLIO_FEE_PCT, first: int = 0,
+                       cooldown: int = COOLDOWN_DAYS) -> dict:
+    """
+    Run the account over panel rows [first:].
+
+    Returns {"equity": Series (date → ₪), "trades": DataFrame, "stats": dict}.
+    """
+    buy, sell = panel.signals(params)
+    rank      = _rank_matrix(panel, params, scores)
+    close     = panel.close[first:]
+    valid     = panel.valid[first:]
+    buy, sell, rank = buy[first:], sell[first:], rank[first:]
+    index     = panel.index[first:]
+    marks     = pd.DataFrame(close).ffill().to_numpy()     # last known close for valuation
+    fee       = fee_pct / 100
+
+    n_days, n_cols = close.shape
+    cash      = float(capital)
+    shares    = np.zeros(n_cols)
+    cost      = np.zeros(n_cols)                             # ₪ paid incl. fee
+    entry_row = np.full(n_cols, -1)
+    cd_left   = np.zeros(n_cols, dtype=int)
+    equity    = np.empty(n_days)
+    trades    = []
+
+    for t in range(n_days):
+        v     = valid[t]
+        held  = shares > 0
+        cool  = v & (cd_left > 0)
+        cd_left[cool] -= 1
+        act   = v & ~cool
+
+        # ── exits ─────────────────────────────────────────
+        out = act & held & sell[t]
+        if out.any():
+            cols     = np.flatnonzero(out)
+            proceeds = shares[cols] * close[t, cols] * (1 - fee)
+            cash    += proceeds.sum()
+            pnl      = proceeds - cost[cols]
+            cd_left[cols[pnl <= 0]] = cooldown
+            for c, p, pr in zip(cols, pnl, proceeds):
+                trades.append((c, entry_row[c], t, cost[c], pr, p))
+            shares[cols] = 0.0
+            cost[cols]   = 0.0
+            held[cols]   = False
+
+        # ── entries ───────────────────────────────────────
+        slots = max_positions - int(held.sum())
+        cand  = act & ~held & ~out & buy[t] & (cd_left == 0)
+        if slots > 0 and cand.any():
+            cols  = np.flatnonzero(cand)
+            cols  = cols[np.argsort(-rank[t, cols], kind='stable')][:slots]
+            value = cash + float(np.nansum(shares * marks[t]))   # unlisted tickers mark NaN
+            alloc = np.minimum(value / max_positions, cash / len(cols))
+            if alloc > 0:
+                shares[cols]    = alloc * (1 - fee) / close[t, cols]
+                cost[cols]      = alloc
+                entry_row[cols] = t
+                cash           -= alloc * len(cols)
+
+        equity[t] = cash + float(np.nansum(shares * marks[t]))
+
+    for c in np.flatnonzero(shares > 0):                      # still open → marked to market
+        value = shares[c] * marks[-1, c]
+        trades.append((c, entry_row[c], -1, cost[c], value, value - cost[c]))
+
+    eq = pd.Series(equity, index=index, name="equity")
+    return {"equity": eq, "trades": _trade_table(panel, index, trades),
+            "stats": _equity_stats(eq, capital, trades, shares > 0)}
+
+
+def _trade_table(panel, index, trades: list) -> pd.DataFrame:
+    rows = [{
+        "ticker":     panel.tickers[c],
+        "entry_date": index[e].strftime("%Y-%m-%d"),
+        "exit_date":  index[x].strftime("%Y-%m-%d") if x >= 0 else "פתוח",
+        "cost":       round(float(cost), 2),
+        "value":      round(float(val), 2),
+        "pnl":        round(float(pnl), 2),
+        "return_%":   round(float(pnl / cost * 100), 2) if cost else 0.0,
+        "status":     "סגור" if x >= 0 else "פתוח",
+    } for c, e, x, cost, val, pnl in trades]
+    return pd.DataFrame(rows)
+
+
+def _equity_stats(eq: pd.Series, capital: float, trades: list, open_mask) -> dict:
+    if eq.empty:
+        return {}
+    final  = float(eq.iloc[-1])
+    years  = max((eq.index[-1] - eq.index[0]).days / 365.25, 1 / 365.25)
+    peak   = eq.cummax()
+    closed = [p for _, _, x, _, _, p in trades if x >= 0]
+    return {
+        "start_capital":  round(capital, 2),
+        "final_equity":   round(final, 2),
+        "total_return_%": round((final / capital - 1) * 100, 2),
+        "cagr_%":         round(((final / capital) ** (1 / years) - 1) * 100, 2) if final > 0 else -100.0,
+        "max_drawdown_%": round(float(((eq - peak) / peak).min() * 100), 2),
+        "trades":         len(trades),
+        "win_rate":       round(sum(1 for p in closed if p > 0) / len(closed) * 100, 1) if closed else 0.0,
+        "open_positions": int(np.sum(open_mask)),
+    }
+
+
+def run_portfolio_backtest_il(tickers: list, params: dict, capital: float = PORTFOLIO_CAPITAL,
+                              max_positions: int = PORTFOLIO_POSITIONS, scores: dict = None,
+                              days: int = 365, session=None,
+                              fee_pct: float = PORTFOLIO_FEE_PCT) -> dict:
+    """
+    Load history (plus a 200-bar warm-up for the MAs) and simulate the account over
+    the last `days`. `scores` = {ticker: screener score} to rank simultaneous signals.
+    """
+    panel = load_signal_panel(tickers, days=days + 300, session=session)
+    first = panel.row_of(datetime.today() - timedelta(days=days))
+    return simulate_portfolio(panel, params, capital, max_positions, scores, fee_pct, first)
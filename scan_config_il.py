@@ -0,0 +1,6 @@
+"""
+scan_config_il.py — Scan settings shared by the app sidebar, the CLI and the scan engine
+הגדרות סריקה משותפות — ללא ייבוא כבד, כדי שהסרגל הצדדי ייטען מיד
+"""
+
+SCAN_WORKERS = 8                 # threads in the Step 1 scan pool
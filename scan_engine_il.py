@@ -0,0 +1,172 @@
+"""
+scan_engine_il.py — Concurrent Step 1 scan
+מנוע סריקה מקבילי — שלב 1
+
+Logic:
+- Phase 1 (prefilter): min_price / min_volume checked on the last stored bars —
+  no network — or, for tickers never stored or stored more than PREFILTER_MAX_AGE
+  ago, on one batched 1-month quote request. Rejected tickers are never preloaded,
+  so their files would otherwise never refresh and they'd stay excluded for good.
+  A safety margin keeps borderline tickers, since stored bars may be a day old.
+- Phase 2: full history is loaded only for the survivors, then calculate_indicators_il
+  runs over them on a bounded thread pool
+- Beta / RS vs TA-125 for all survivors come from one cross-section pass
+  (cross_section_il) before the pool starts, instead of per ticker
+- Progress is reported as tickers complete (completion order)
+- Results come back in universe order, so the same inputs always give the same list
+- build_metrics_table_il(): same two phases, but computes the unfiltered metrics of
+  every ticker (prefilter at the loosest sidebar bounds). The app keeps that table
+  and re-runs filter_and_score_il on it when a sidebar filter moves — no downloads
+"""
+
+import numpy as np
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from screener_il import calculate_indicators_il, compute_metrics_il
+from data_store_il import read_stored, stored_age, fetch_quotes
+from cross_section_il import universe_beta_rs
+from scan_config_il import SCAN_WORKERS
+
+
+PREFILTER_MARGIN  = 0.10          # keep tickers up to 10% below min_price / min_volume
+PREFILTER_MAX_AGE = 2 * 86400    # stored bars older than this are re-checked on fresh quotes
+METRICS_FLOOR     = {"min_price": 2, "min_volume": 10_000}   # sidebar minimums
+
+
+def _map_tickers(fn, tickers: list, params: dict, max_workers: int,
+                 progress_bar=None, status_text=None, session=None, keep=bool) -> list:
+    """fn(ticker, params, session) over a thread pool → kept results in the order of `tickers`."""
+    slots = [None] * len(tickers)
+    done, found, total = 0, 0, len(tickers)
+    if not total:
+        return []
+
+    with ThreadPoolExecutor(max_workers=max(1, int(max_workers))) as ex:
+        futures = {ex.submit(fn, t, params, session): i
+                   for i, t in enumerate(tickers)}
+        for fut in as_completed(futures):
+            i = futures[fut]
+            done += 1
+            try:
+                res = fut.result()
+            except Exception:
+                res = None
+            if res and keep(res):
+                slots[i] = res
+                found += 1
+            if progress_bar:
+                progress_bar.progress(done / total)
+            if status_text:
+                status_text.caption(f"Scanning {tickers[i].replace('.TA', '')}… "
+                                    f"({done}/{total}) — found: {found}")
+
+    return [r for r in slots if r]
+
+
+def run_scan_il(tickers: list, params: dict, max_workers: int = SCAN_WORKERS,
+                progress_bar=None, status_text=None, session=None, cross: dict = None) -> list:
+    """
+    Scan `tickers` concurrently with `max_workers` threads.
+    `session` (DataSession) is shared with the later backtest / VIX / chart steps.
+    `cross` — precomputed beta / RS (universe_beta_rs); tickers missing from it compute their own.
+    Returns the dicts of tickers that passed the filters, in the order of `tickers`.
+    """
+    return _map_tickers(partial(calculate_indicators_il, cross=cross), tickers, params, max_workers,
+                        progress_bar, status_text, session,
+                        keep=lambda r: r.get('passes_filter'))
+
+
+def _quick_check(df, min_price: float, min_volume: float):
+    """True / False from the last bars, or None if there are no bars to judge by."""
+    if df is None or df.empty:
+        return None
+    price = float(df['Close'].iloc[-1])
+    if price < min_price:
+        return False
+    if 'Volume' in df.columns and len(df) >= 20:
+        avg_vol = float(df['Volume'].iloc[-20:].mean())
+        if np.isnan(avg_vol) or avg_vol < min_volume:
+            return False
+    return True
+
+
+def prefilter_il(tickers: list, params: dict, margin: float = PREFILTER_MARGIN) -> tuple:
+    """
+    Phase 1 — drop tickers that clearly fail min_price / min_volume before any history
+    download. Returns (survivors in input order, stats dict).
+    """
+    min_price  = params.get('min_price', 5) * (1 - margin)
+    min_volume = params.get('min_volume', 50_000) * (1 - margin)
+
+    verdict = {}
+    for t in tickers:
+        age = stored_age(t)
+        recent = age is not None and age < PREFILTER_MAX_AGE
+        verdict[t] = _quick_check(read_stored(t), min_price, min_volume) if recent else None
+    unknown = [t for t, v in verdict.items() if v is None]
+    quotes  = fetch_quotes(unknown) if unknown else {}
+    for t in unknown:
+        verdict[t] = _quick_check(quotes.get(t), min_price, min_volume)
+
+    survivors = [t for t in tickers if verdict[t] is not False]
+    stats = {
+        "universe":           len(tickers),
+        "prefilter_rejected": len(tickers) - len(survivors),
+        "from_store":         len(tickers) - len(unknown),
+        "from_quotes":        len(unknown),
+    }
+    return survivors, stats
+
+
+def run_two_phase_scan_il(tickers: list, params: dict, session,
+                          max_workers: int = SCAN_WORKERS,
+                          progress_bar=None, status_text=None) -> tuple:
+    """
+    Prefilter → load full history for survivors into `session` → indicators.
+    Returns (results, stats) with rejection counts per phase.
+    """
+    if status_text:
+        status_text.caption("Phase 1 — price / volume prefilter…")
+    survivors, stats = prefilter_il(tickers, params)
+
+    if status_text:
+        status_text.caption(f"Downloading price history for {len(survivors)} stocks…")
+    if progress_bar:
+        session.preload(survivors, progress_cb=lambda d, n: progress_bar.progress(d / n))
+    else:
+        session.preload(survivors)
+
+    cross   = universe_beta_rs(survivors, session)
+    results = run_scan_il(survivors, params, max_workers, progress_bar, status_text, session, cross)
+    stats["history_scanned"]  = len(survivors)
+    stats["history_rejected"] = len(survivors) - len(results)
+    stats["passed"]           = len(results)
+    return results, stats
+
+
+def build_metrics_table_il(tickers: list, params: dict, session,
+                           max_workers: int = SCAN_WORKERS,
+                           progress_bar=None, status_text=None) -> tuple:
+    """
+    Prefilter at METRICS_FLOOR → load survivors into `session` → compute_metrics_il
+    for each. Returns (metrics list in universe order, stats). Only the indicator
+    params (rsi_period, bb_period, bb_std) matter here; filter with filter_and_score_il.
+    """
+    if status_text:
+        status_text.caption("Phase 1 — price / volume prefilter…")
+    survivors, stats = prefilter_il(tickers, METRICS_FLOOR)
+
+    if status_text:
+        status_text.caption(f"Downloading price history for {len(survivors)} stocks…")
+    if progress_bar:
+        session.preload(survivors, progress_cb=lambda d, n: progress_bar.progress(d / n))
+    else:
+        session.preload(survivors)
+
+    cross   = universe_beta_rs(survivors, session)
+    metrics = _map_tickers(partial(compute_metrics_il, cross=cross), survivors, params, max_workers,
+                           progress_bar, status_text, session)
+    stats["history_scanned"] = len(survivors)
+    stats["metrics"]         = len(metrics)
+    return metrics, stats
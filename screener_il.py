@@ -12,29 +12,25 @@ screener_il.py — Israel TASE Stock Screener
 - אין ממשל שוק יומי זמין חינם → ניתוח טכני בלבד
 """
 
-import yfinance as yf
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
+
+from data_store_il import get_ohlcv
+from metadata_cache_il import get_cached_metadata
+from extrema_il import ExtremaIndex, cluster_levels
+from indicator_state_il import sync_state, read_indicators
+from benchmark_il import get_benchmark
 
 
 # ──────────────────────────────────────────────────────────────
 #  DATA DOWNLOAD
 # ──────────────────────────────────────────────────────────────
-def _get_ohlcv(ticker: str, period: str = "1y") -> pd.DataFrame:
-    try:
-        t  = yf.Ticker(ticker)
-        df = t.history(period=period, interval="1d", auto_adjust=True, actions=False)
-        if df is None or df.empty or 'Close' not in df.columns:
-            return pd.DataFrame()
-        cols = [c for c in ['Open','High','Low','Close','Volume'] if c in df.columns]
-        df = df[cols].dropna(subset=['Close']).copy()
-        # Handle MultiIndex columns (yfinance quirk)
-        if isinstance(df.columns, pd.MultiIndex):
-            df.columns = df.columns.get_level_values(0)
-        return df
-    except Exception:
-        return pd.DataFrame()
+def _get_ohlcv(ticker: str, period: str = "1y", session=None) -> pd.DataFrame:
+    """נתונים יומיים מה-DataSession אם יש, אחרת מהמאגר המקומי — מוריד רק את הימים החסרים."""
+    if session is not None:
+        return session.get(ticker, period=period)
+    return get_ohlcv(ticker, period=period)
 
 
 # ──────────────────────────────────────────────────────────────
@@ -109,18 +105,27 @@ def _uptrend_52w(close: pd.Series) -> bool:
     return False
 
 
-def _relative_strength_tase(close: pd.Series, bench_close: pd.Series) -> float:
-    """RS = תשואת המניה / תשואת ת"א 125 ב-63 ימים אחרונים."""
+def _relative_strength_tase(close: pd.Series, bench_close: pd.Series,
+                            bench_aligned: np.ndarray = None) -> float:
+    """
+    RS = תשואת המניה / תשואת ת"א 125 ב-63 ימים אחרונים.
+    bench_aligned — סגירות המדד על האינדקס של close (BenchmarkData.align), חוסך intersection.
+    """
     try:
         if len(close) < 65 or len(bench_close) < 65:
             return 1.0
-        common = close.index.intersection(bench_close.index)
-        if len(common) < 50:
+        if bench_aligned is not None:
+            common = ~np.isnan(bench_aligned)
+            s = close.to_numpy(dtype=float)[common]
+            m = bench_aligned[common]
+        else:
+            common = close.index.intersection(bench_close.index)
+            s = close.loc[common].to_numpy(dtype=float)
+            m = bench_close.loc[common].to_numpy(dtype=float)
+        if len(s) < 50:
             return 1.0
-        s = close.loc[common]
-        m = bench_close.loc[common]
-        stock_ret = float(s.iloc[-1]) / float(s.iloc[-63]) - 1
-        bench_ret = float(m.iloc[-1]) / float(m.iloc[-63]) - 1
+        stock_ret = float(s[-1]) / float(s[-63]) - 1
+        bench_ret = float(m[-1]) / float(m[-63]) - 1
         if bench_ret == 0:
             return 1.0
         return round(stock_ret / abs(bench_ret), 2)
@@ -128,16 +133,25 @@ def _relative_strength_tase(close: pd.Series, bench_close: pd.Series) -> float:
         return 1.0
 
 
-def _beta_tase(close: pd.Series, bench_close: pd.Series) -> float:
-    """בטא מול ת"א 125."""
+def _beta_tase(close: pd.Series, bench_close: pd.Series,
+               bench_returns_aligned: np.ndarray = None) -> float:
+    """
+    בטא מול ת"א 125.
+    bench_returns_aligned — תשואות המדד על האינדקס של close (BenchmarkData.align).
+    """
     try:
-        s = close.pct_change().dropna()
-        m = bench_close.pct_change().dropna()
-        common = s.index.intersection(m.index)
-        if len(common) < 30:
+        if bench_returns_aligned is not None:
+            s  = close.pct_change().to_numpy(dtype=float)
+            ok = ~np.isnan(s) & ~np.isnan(bench_returns_aligned)
+            sv, mv = s[ok], bench_returns_aligned[ok]
+        else:
+            s = close.pct_change().dropna()
+            m = bench_close.pct_change().dropna()
+            common = s.index.intersection(m.index)
+            sv = s.loc[common].values.astype(float)
+            mv = m.loc[common].values.astype(float)
+        if len(sv) < 30:
             return 1.0
-        sv = s.loc[common].values.astype(float)
-        mv = m.loc[common].values.astype(float)
         cov = np.cov(sv, mv)[0][1]
         var = np.var(mv)
         return round(float(cov / var), 2) if var > 0 else 1.0
@@ -145,37 +159,18 @@ def _beta_tase(close: pd.Series, bench_close: pd.Series) -> float:
         return 1.0
 
 
-def _support_resistance(df: pd.DataFrame, window: int = 8, n: int = 2):
+def _support_resistance(df: pd.DataFrame, window: int = 8, n: int = 2, ext: ExtremaIndex = None):
     """
     רמות תמיכה/התנגדות — window קצר יותר כי שוק ישראלי פחות סחיר.
+    ext — ExtremaIndex מוכן (משותף עם _chart_patterns), אחרת נבנה כאן.
     """
     try:
-        close = df['Close']
-        high  = df['High']
-        low   = df['Low']
-        price = float(close.iloc[-1])
-
-        local_highs, local_lows = [], []
-        for i in range(window, len(close) - window):
-            if float(high.iloc[i]) == float(high.iloc[i-window:i+window+1].max()):
-                local_highs.append(float(high.iloc[i]))
-            if float(low.iloc[i]) == float(low.iloc[i-window:i+window+1].min()):
-                local_lows.append(float(low.iloc[i]))
-
-        def cluster(levels, pct=0.025):
-            if not levels:
-                return []
-            levels = sorted(levels)
-            clusters = [[levels[0]]]
-            for lvl in levels[1:]:
-                if abs(lvl - clusters[-1][-1]) / clusters[-1][-1] < pct:
-                    clusters[-1].append(lvl)
-                else:
-                    clusters.append([lvl])
-            return [round(np.mean(c), 2) for c in clusters if len(c) >= n]
-
-        supports    = cluster(local_lows)
-        resistances = cluster(local_highs)
+        if ext is None or ext.window != window:
+            ext = ExtremaIndex(df, window)
+        price = float(ext.close[-1])
+
+        supports    = cluster_levels(ext.local_lows,  min_size=n)
+        resistances = cluster_levels(ext.local_highs, min_size=n)
 
         sup  = max([s for s in supports    if s < price], default=None)
         res  = min([r for r in resistances if r > price], default=None)
@@ -198,31 +193,31 @@ def _volume_spike(volume: pd.Series, threshold: float = 2.0):
         return 1.0, False
 
 
-def _chart_patterns(df: pd.DataFrame) -> list:
+def _chart_patterns(df: pd.DataFrame, ext: ExtremaIndex = None) -> list:
     patterns = []
     try:
-        close = df['Close']
-        high  = df['High']
-        low   = df['Low']
+        if ext is None:
+            ext = ExtremaIndex(df)
+        close, high, low = ext.close, ext.high, ext.low
         if len(close) < 40:
             return patterns
 
-        price = float(close.iloc[-1])
-        last60 = close.iloc[-60:]
+        price = float(close[-1])
+        last60 = close[-60:]
         if len(last60) >= 40:
             half  = len(last60) // 2
-            low1  = float(last60.iloc[:half].min())
-            low2  = float(last60.iloc[half:].min())
-            mid_h = float(last60.iloc[half//2:half+half//2].max())
+            low1  = float(last60[:half].min())
+            low2  = float(last60[half:].min())
+            mid_h = float(last60[half//2:half+half//2].max())
             if (abs(low1 - low2) / ((low1+low2)/2) < 0.035 and
                 mid_h > max(low1, low2) * 1.025 and
                 price > mid_h * 0.97):
                 patterns.append("תחתית כפולה (W)")
 
-        last40_high = high.iloc[-40:]
-        last40_low  = low.iloc[-40:]
-        res_flat    = (float(last40_high.max()) - float(last40_high.min())) / float(last40_high.mean()) < 0.045
-        lows_arr    = last40_low.values.astype(float)
+        last40_high = high[-40:]
+        last40_low  = low[-40:]
+        res_flat    = (float(np.nanmax(last40_high)) - float(np.nanmin(last40_high))) / float(np.nanmean(last40_high)) < 0.045
+        lows_arr    = last40_low
         if len(lows_arr) > 5:
             x = np.arange(len(lows_arr))
             slope = np.polyfit(x, lows_arr, 1)[0]
@@ -231,12 +226,12 @@ def _chart_patterns(df: pd.DataFrame) -> list:
 
         # גל עולה — higher highs + higher lows
         if len(close) >= 30:
-            q1 = float(close.iloc[-30:-20].max())
-            q2 = float(close.iloc[-20:-10].max())
-            q3 = float(close.iloc[-10:].max())
-            l1 = float(close.iloc[-30:-20].min())
-            l2 = float(close.iloc[-20:-10].min())
-            l3 = float(close.iloc[-10:].min())
+            q1 = float(close[-30:-20].max())
+            q2 = float(close[-20:-10].max())
+            q3 = float(close[-10:].max())
+            l1 = float(close[-30:-20].min())
+            l2 = float(close[-20:-10].min())
+            l3 = float(close[-10:].min())
             if q3 > q2 > q1 and l3 > l2 > l1:
                 patterns.append("מגמת עלייה (HH+HL)")
     except Exception:
@@ -322,36 +317,42 @@ def debug_ticker_il(ticker: str, params: dict) -> str:
         return f"{ticker}: ❌ שגיאה: {e}"
 
 
-# ──────────────────────────────────────────────────────────────
-#  BENCHMARK CACHE
-# ──────────────────────────────────────────────────────────────
-_BENCH_CACHE = {}
-
-def _get_benchmark() -> pd.Series:
-    global _BENCH_CACHE
-    key = datetime.today().strftime('%Y-%m-%d')
-    if key in _BENCH_CACHE:
-        return _BENCH_CACHE[key]
-    # נסה ת"א 125, אם נכשל — ת"א 35
-    for sym in ["^TA125.TA", "^TA35.TA", "TA125.TA", "TA35.TA"]:
-        df = _get_ohlcv(sym, period="1y")
-        if not df.empty:
-            s = df['Close']
-            _BENCH_CACHE = {key: s}
-            return s
-    return pd.Series(dtype=float)
-
-
 # ──────────────────────────────────────────────────────────────
 #  MAIN SCREENER
+#  compute_metrics_il — every indicator, no filters (cacheable per ticker)
+#  filter_and_score_il — sidebar filters + score as vectorized queries
 # ──────────────────────────────────────────────────────────────
-def calculate_indicators_il(ticker: str, params: dict):
+# keys of a screener result, in order
+RESULT_KEYS = [
+    "ticker", "ticker_short", "name", "price", "currency", "market_cap_m", "rsi",
+    "ma20", "ma50", "ma120", "ma200", "above_ma", "above_50", "above_20",
+    "bb_pct", "bb_upper", "bb_lower", "trend_4w", "uptrend_52w", "beta", "rs",
+    "avg_volume", "volume_ratio", "volume_spike", "macd_line", "macd_signal",
+    "macd_hist", "macd_bullish", "support", "resistance", "near_support", "patterns",
+    "rr_ratio", "rr_valid", "rr_stop", "rr_target", "signal_fresh", "signal_date",
+    "summary", "score", "passes_filter",
+]
+# numeric columns the filter / score stage reads
+METRIC_COLUMNS = [
+    "price", "avg_vol", "above_ma", "above_50", "above_20", "rsi", "rsi_prev5", "bars",
+    "uptrend_52w", "trend_4w", "beta", "rs", "bb_pct", "macd_bullish", "volume_spike",
+    "volume_ratio", "near_support", "has_patterns", "rr_valid",
+]
+# params that change the metrics themselves (everything else only filters)
+INDICATOR_PARAMS = ("rsi_period", "bb_period", "bb_std")
+
+
+def compute_metrics_il(ticker: str, params: dict, session=None, cross: dict = None):
     """
-    מחשב אינדיקטורים ומסנן מניות TASE.
-    מחזיר dict עם כל הנתונים אם המניה עוברת את הפילטרים, אחרת None.
+    כל האינדיקטורים למניה — בלי פילטרים.
+    מחזיר dict (שדות התוצאה חוץ מ-signal_fresh / score / passes_filter, ועוד
+    avg_vol, rsi_prev5, bars) או None אם אין מספיק נתונים.
+    רק rsi_period / bb_period / bb_std מתוך params משפיעים כאן.
+    cross — {ticker: {"beta", "rs", ...}} מ-cross_section_il.universe_beta_rs (אופציונלי);
+    מניה שנמצאת בו לא מחשבת בטא / RS בעצמה.
     """
     try:
-        df = _get_ohlcv(ticker, period="2y")
+        df = _get_ohlcv(ticker, period="2y", session=session)
         if df.empty or len(df) < 40:
             return None
 
@@ -359,24 +360,15 @@ def calculate_indicators_il(ticker: str, params: dict):
         volume = df['Volume'] if 'Volume' in df.columns else pd.Series(dtype=float)
         price  = round(float(close.iloc[-1]), 2)
 
-        # ── פילטר מחיר ──────────────────────────────────────────
-        min_price = params.get('min_price', 5)      # שקלים
-        if price < min_price:
-            return None
+        # ── מצב אינדיקטורים מצטבר — מתקדם רק בנרות החדשים ───────
+        rsi_period = params.get('rsi_period', 14)
+        state = sync_state(ticker, df, rsi_period, params.get('bb_period', 20))
+        ind   = read_indicators(state, params.get('bb_std', 2.0), bars=len(close))
 
-        # ── פילטר נפח ─────────────────────────────────────────────
-        if not volume.empty and len(volume) >= 20:
-            avg_vol = float(volume.rolling(20).mean().iloc[-1])
-        else:
-            avg_vol = 0
-        if np.isnan(avg_vol) or avg_vol < params.get('min_volume', 50_000):
-            return None
+        avg_vol = ind['avg_volume'] if not volume.empty else 0
 
         # ── ממוצעים נעים ─────────────────────────────────────────
-        ma20  = round(float(close.rolling(20).mean().iloc[-1]),  2) if len(close) >= 20  else None
-        ma50  = round(float(close.rolling(50).mean().iloc[-1]),  2) if len(close) >= 50  else None
-        ma120 = round(float(close.rolling(120).mean().iloc[-1]), 2) if len(close) >= 120 else None
-        ma200 = round(float(close.rolling(200).mean().iloc[-1]), 2) if len(close) >= 200 else None
+        ma20, ma50, ma120, ma200 = ind['ma20'], ind['ma50'], ind['ma120'], ind['ma200']
 
         def ok(v): return v is not None and not np.isnan(v)
 
@@ -386,127 +378,40 @@ def calculate_indicators_il(ticker: str, params: dict):
         above_50 = ok(ma50)    and price > ma50 * 0.97
         above_20 = ok(ma20)    and price > ma20
 
-        if params.get('require_above_ma', True) and not above_ma:
-            return None
-        if params.get('require_above_50', True) and not above_50:
-            return None
-
-        # ── RSI ───────────────────────────────────────────────────
-        rsi_period  = params.get('rsi_period', 14)
-        rsi_max_val = params.get('rsi_max', 90)
-        rsi_min_val = params.get('rsi_min', 0)
-        current_rsi = _rsi(close, rsi_period)
-        if current_rsi > rsi_max_val or current_rsi < rsi_min_val:
-            return None
-
-        # ── מגמה ─────────────────────────────────────────────────
+        # ── RSI / מגמה / בולינגר / MACD ──────────────────────────
+        current_rsi = ind['rsi']
         uptrend_52w = _uptrend_52w(close)
-        if params.get('require_uptrend_52w', True) and not uptrend_52w:
-            return None
-
-        trend_4w = _trend_pct(close, 20)
-        if trend_4w < -20.0:
-            return None
-
-        # ── בולינגר ──────────────────────────────────────────────
-        bb_pct, bb_upper_v, bb_lower_v = _bb(
-            close, params.get('bb_period', 20), params.get('bb_std', 2.0))
-
-        # ── MACD ─────────────────────────────────────────────────
-        macd_line, macd_signal, macd_hist = _macd(close)
+        trend_4w    = _trend_pct(close, 20)
+        bb_pct, bb_upper_v, bb_lower_v = ind['bb_pct'], ind['bb_upper'], ind['bb_lower']
+        macd_line, macd_signal, macd_hist = ind['macd_line'], ind['macd_signal'], ind['macd_hist']
         macd_bullish = macd_hist > 0
 
         # ── מדד ייחוס (ת"א 125) ──────────────────────────────────
-        bench = _get_benchmark()
-        beta  = _beta_tase(close, bench)
-
-        min_beta = params.get('min_beta', 0.5)
-        if min_beta > 0 and not np.isnan(beta) and beta < min_beta:
-            return None
-
-        rs = _relative_strength_tase(close, bench)
+        if cross and ticker in cross:                 # כבר חושב לכל היקום
+            beta, rs = cross[ticker]['beta'], cross[ticker]['rs']
+        else:
+            bench = get_benchmark()
+            if bench is not None:
+                b_close, b_ret = bench.align(close.index)
+                beta = _beta_tase(close, bench.close, b_ret)
+                rs   = _relative_strength_tase(close, bench.close, b_close)
+            else:
+                beta = _beta_tase(close, pd.Series(dtype=float))
+                rs   = 1.0
 
         # ── נפח ──────────────────────────────────────────────────
-        vol_ratio, vol_spike = _volume_spike(volume)
-
-        # ── תמיכה/התנגדות ────────────────────────────────────────
-        support, resistance, near_support = _support_resistance(df)
+        vol_ratio, vol_spike = ind['volume_ratio'], ind['volume_spike']
 
-        # ── תבניות ───────────────────────────────────────────────
-        patterns = _chart_patterns(df)
-
-        # ── R/R ──────────────────────────────────────────────────
+        # ── תמיכה/התנגדות, תבניות, R/R ───────────────────────────
+        ext = ExtremaIndex(df)
+        support, resistance, near_support = _support_resistance(df, ext=ext)
+        patterns = _chart_patterns(df, ext=ext)
         rr = _risk_reward(price, support, resistance)
 
-        # ── ניתוח עדכניות סיגנל ──────────────────────────────────
-        signal_fresh = True
-        try:
-            g = close.diff().clip(lower=0).ewm(com=rsi_period-1, min_periods=rsi_period).mean()
-            l = (-close.diff().clip(upper=0)).ewm(com=rsi_period-1, min_periods=rsi_period).mean()
-            rsi_ser = 100 - (100 / (1 + g / l))
-            if len(rsi_ser) > 5:
-                prev = float(rsi_ser.iloc[-5])
-                signal_fresh = (not np.isnan(prev)) and prev > rsi_max_val
-        except Exception:
-            signal_fresh = True
-
-        # ── ניקוד (0–10) ──────────────────────────────────────────
-        score = 0.0
-
-        # RSI
-        if   current_rsi < 20: score += 4.0
-        elif current_rsi < 25: score += 3.0
-        elif current_rsi < 30: score += 2.5
-        elif current_rsi < 35: score += 2.0
-        elif current_rsi < 40: score += 1.5
-        elif current_rsi < 50: score += 1.0
-        else:                  score += 0.5
-
-        # BB
-        if   bb_pct < 0.05: score += 3.0
-        elif bb_pct < 0.10: score += 2.5
-        elif bb_pct < 0.20: score += 2.0
-        elif bb_pct < 0.35: score += 1.5
-        elif bb_pct < 0.50: score += 0.5
-
-        # טרנד
-        if   trend_4w >  5: score += 1.5
-        elif trend_4w >  0: score += 1.0
-        elif trend_4w > -5: score += 0.3
-
-        # MA
-        if above_ma:    score += 0.5
-        if above_50:    score += 0.5
-        if above_20:    score += 0.3
-        if uptrend_52w: score += 1.0
-
-        # MACD
-        if macd_bullish: score += 0.5
-
-        # נפח
-        if vol_spike:         score += 0.7
-        elif vol_ratio > 1.5: score += 0.3
-
-        # חוזק יחסי
-        if   rs > 1.5: score += 1.0
-        elif rs > 1.0: score += 0.5
-
-        # תמיכה / תבניות / R/R / סיגנל טרי
-        if near_support:        score += 0.5
-        if patterns:            score += 0.5
-        if rr.get('valid'):     score += 0.5
-        if signal_fresh:        score += 0.5
-
-        score = round(min(10.0, score), 1)
-
-        # ── שם החברה ─────────────────────────────────────────────
-        name = ticker.replace('.TA', '')
-        try:
-            info = yf.Ticker(ticker).info
-            long_name = info.get('longName') or info.get('shortName') or name
-            name = long_name
-        except Exception:
-            pass
+        # ── שם החברה ושווי שוק — מהמטמון בלבד (prefetch_metadata) ──
+        meta       = get_cached_metadata(ticker) or {}
+        name       = meta.get('name') or ticker.replace('.TA', '')
+        market_cap = meta.get('market_cap_m')
 
         # ── סיכום ────────────────────────────────────────────────
         summary = _generate_summary(
@@ -514,16 +419,6 @@ def calculate_indicators_il(ticker: str, params: dict):
             above_ma, uptrend_52w, near_support, rs,
             patterns, vol_spike, bb_pct, rr)
 
-        # ── שווי שוק (אם זמין) ──────────────────────────────────
-        market_cap = None
-        try:
-            info = yf.Ticker(ticker).fast_info
-            mc = getattr(info, 'market_cap', None)
-            if mc:
-                market_cap = round(mc / 1_000_000, 0)  # במיליוני ₪
-        except Exception:
-            pass
-
         return {
             "ticker":        ticker,
             "ticker_short":  ticker.replace('.TA', ''),
@@ -561,12 +456,113 @@ def calculate_indicators_il(ticker: str, params: dict):
             "rr_valid":      rr.get("valid", False),
             "rr_stop":       rr.get("stop"),
             "rr_target":     rr.get("target"),
-            "signal_fresh":  signal_fresh,
             "signal_date":   datetime.today().strftime('%Y-%m-%d'),
             "summary":       summary,
-            "score":         score,
-            "passes_filter": True,
+            # ── לשלב הפילטר בלבד ──
+            "avg_vol":       float(avg_vol),
+            "rsi_prev5":     float(ind['rsi_prev5']),
+            "bars":          len(close),
         }
 
     except Exception:
         return None
+
+
+def metrics_frame(metrics: list) -> pd.DataFrame:
+    """The numeric columns of a list of compute_metrics_il dicts — one row per ticker."""
+    rows = [{**{k: m.get(k) for k in METRIC_COLUMNS if k != "has_patterns"},
+             "has_patterns": bool(m.get("patterns"))} for m in metrics]
+    return pd.DataFrame(rows, columns=METRIC_COLUMNS).astype(float)
+
+
+def _score(t: pd.DataFrame, signal_fresh: np.ndarray) -> np.ndarray:
+    """Screener score (0–10) for every row — same tiers, same order of additions."""
+    rsi, bb, trend = t['rsi'].to_numpy(), t['bb_pct'].to_numpy(), t['trend_4w'].to_numpy()
+    rs, vr = t['rs'].to_numpy(), t['volume_ratio'].to_numpy()
+    flag = lambda c: t[c].to_numpy() > 0
+
+    score = np.zeros(len(t))
+    # RSI
+    score += np.select([rsi < 20, rsi < 25, rsi < 30, rsi < 35, rsi < 40, rsi < 50],
+                       [4.0, 3.0, 2.5, 2.0, 1.5, 1.0], 0.5)
+    # BB
+    score += np.select([bb < 0.05, bb < 0.10, bb < 0.20, bb < 0.35, bb < 0.50],
+                       [3.0, 2.5, 2.0, 1.5, 0.5], 0.0)
+    # טרנד
+    score += np.select([trend > 5, trend > 0, trend > -5], [1.5, 1.0, 0.3], 0.0)
+    # MA
+    score += np.where(flag('above_ma'), 0.5, 0.0)
+    score += np.where(flag('above_50'), 0.5, 0.0)
+    score += np.where(flag('above_20'), 0.3, 0.0)
+    score += np.where(flag('uptrend_52w'), 1.0, 0.0)
+    # MACD
+    score += np.where(flag('macd_bullish'), 0.5, 0.0)
+    # נפח
+    score += np.where(flag('volume_spike'), 0.7, np.where(vr > 1.5, 0.3, 0.0))
+    # חוזק יחסי
+    score += np.select([rs > 1.5, rs > 1.0], [1.0, 0.5], 0.0)
+    # תמיכה / תבניות / R/R / סיגנל טרי
+    score += np.where(flag('near_support'), 0.5, 0.0)
+    score += np.where(flag('has_patterns'), 0.5, 0.0)
+    score += np.where(flag('rr_valid'), 0.5, 0.0)
+    score += np.where(signal_fresh, 0.5, 0.0)
+    return np.minimum(10.0, score)
+
+
+def filter_and_score_il(metrics: list, params: dict, frame: pd.DataFrame = None) -> list:
+    """
+    פילטרים + ניקוד על טבלת המדדים — שאילתות וקטוריות, בלי הורדות ובלי חישוב מחדש.
+    `metrics` = list of compute_metrics_il dicts, `frame` = metrics_frame(metrics)
+    (pass it to skip rebuilding it on every call). Returns screener results (same
+    dicts calculate_indicators_il returns) for the rows that pass, in input order.
+    """
+    if not metrics:
+        return []
+    t = frame if frame is not None else metrics_frame(metrics)
+    with np.errstate(invalid='ignore'):
+        rsi_max_val = params.get('rsi_max', 90)
+        rsi_min_val = params.get('rsi_min', 0)
+        min_beta    = params.get('min_beta', 0.5)
+        avg, beta   = t['avg_vol'].to_numpy(), t['beta'].to_numpy()
+
+        keep  = t['price'].to_numpy() >= params.get('min_price', 5)
+        keep &= ~np.isnan(avg) & (avg >= params.get('min_volume', 50_000))
+        if params.get('require_above_ma', True):
+            keep &= t['above_ma'].to_numpy() > 0
+        if params.get('require_above_50', True):
+            keep &= t['above_50'].to_numpy() > 0
+        keep &= (t['rsi'].to_numpy() <= rsi_max_val) & (t['rsi'].to_numpy() >= rsi_min_val)
+        if params.get('require_uptrend_52w', True):
+            keep &= t['uptrend_52w'].to_numpy() > 0
+        keep &= t['trend_4w'].to_numpy() >= -20.0
+        if min_beta > 0:
+            keep &= ~(~np.isnan(beta) & (beta < min_beta))
+
+        # RSI לפני 4 נרות מעל הסף → הסיגנל טרי
+        prev  = t['rsi_prev5'].to_numpy()
+        fresh = np.where(t['bars'].to_numpy() > 5, ~np.isnan(prev) & (prev > rsi_max_val), True)
+
+    score = _score(t, fresh)
+    out   = []
+    for i in np.flatnonzero(keep):
+        m = metrics[i]
+        r = {k: m[k] for k in RESULT_KEYS if k in m}
+        r["signal_fresh"]  = bool(fresh[i])
+        r["score"]         = round(float(score[i]), 1)
+        r["passes_filter"] = True
+        out.append({k: r[k] for k in RESULT_KEYS})
+    return out
+
+
+def calculate_indicators_il(ticker: str, params: dict, session=None, cross: dict = None):
+    """
+    מחשב אינדיקטורים ומסנן מניות TASE.
+    מחזיר dict עם כל הנתונים אם המניה עוברת את הפילטרים, אחרת None.
+    session — DataSession משותף לריצה (אופציונלי).
+    cross   — בטא / RS מחושבים מראש לכל היקום (אופציונלי).
+    """
+    m = compute_metrics_il(ticker, params, session, cross)
+    if m is None:
+        return None
+    res = filter_and_score_il([m], params)
+    return res[0] if res else None
@@ -0,0 +1,11 @@
+import pytest
+
+pytest.importorskip("yfinance")
+
+from backtester_il import run_backtest_sweep_il
+
+
+def test_sweep_with_no_tickers():
+    df = run_backtest_sweep_il([], {"rsi_max": [35, 45]}, max_workers=1)
+    assert list(df["rsi_max"]) == [35, 45]
+    assert (df["total_trades"] == 0).all()
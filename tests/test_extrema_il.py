@@ -0,0 +1,35 @@
+import numpy as np
+
+from extrema_il import cluster_levels
+
+
+def _reference(levels, pct=0.025, n=2):
+    """The original per-cluster loop from screener_il._support_resistance."""
+    if not levels:
+        return []
+    levels = sorted(levels)
+    clusters = [[levels[0]]]
+    for lvl in levels[1:]:
+        if abs(lvl - clusters[-1][-1]) / clusters[-1][-1] < pct:
+            clusters[-1].append(lvl)
+        else:
+            clusters.append([lvl])
+    return [round(np.mean(c), 2) for c in clusters if len(c) >= n]
+
+
+def test_half_cent_tie_rounds_like_the_original():
+    # mean = 48.475 exactly; a reduceat sum rounds it to 48.47
+    levels = [49.08, 48.41, 48.2, 48.07, 48.26, 48.29, 48.81, 48.68]
+    assert cluster_levels(levels) == _reference(levels) == [48.48]
+
+
+def test_random_tick_levels_match_the_original():
+    rng = np.random.default_rng(0)
+    for _ in range(2000):
+        levels = list(np.round(rng.uniform(40, 60, rng.integers(2, 30)), 2))
+        for n in (2, 3):
+            assert cluster_levels(levels, min_size=n) == _reference(levels, n=n)
+
+
+def test_empty():
+    assert cluster_levels([]) == []
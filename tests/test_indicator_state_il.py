@@ -0,0 +1,47 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("yfinance")
+
+import indicator_state_il as ist
+
+
+@pytest.fixture(autouse=True)
+def _state_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(ist, "STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(ist, "_MEM", {})
+
+
+def _frame(seed, n=800):
+    rng   = np.random.default_rng(seed)
+    index = pd.bdate_range("2021-01-04", periods=n)
+    close = np.round(40 * np.exp(np.cumsum(rng.normal(0, 0.02, n))), 2)   # tick-quantized
+    vol   = rng.integers(10_000, 500_000, n).astype(float)
+    return pd.DataFrame({"Close": close, "Volume": vol}, index=index)
+
+
+def _half_cent_tie(v: float) -> bool:
+    # pandas' own rolling sum is off by an ulp or two, so an exact x.xx5 mean may round either way
+    return abs(v * 100 - math.floor(v * 100) - 0.5) < 1e-6
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_replayed_windows_match_pandas_rolling(seed):
+    full, window, days = _frame(seed), 500, 300
+    for end in range(window, window + days):
+        df    = full.iloc[end - window:end]              # the screener's sliding window
+        state = ist.sync_state(f"T{seed}.TA", df)        # state carried forward day by day
+        ind   = ist.read_indicators(state, 2.0, bars=len(df))
+        close = df["Close"]
+        for w in ist.MA_WINDOWS:
+            ref  = float(close.rolling(w).mean().iloc[-1])
+            mean = ist._mean(state["closes"], w, state["bars"])
+            assert mean == math.fsum(close.iloc[-w:]) / w             # no accumulated error
+            assert mean == pytest.approx(ref, rel=1e-13, abs=0)
+            assert ind[f"ma{w}"] == round(ref, 2) or _half_cent_tie(ref), (end, w)
+        sd = float(close.rolling(20).std().iloc[-1])
+        assert ist._std(state["closes"], 20, state["bars"]) == pytest.approx(sd, rel=1e-9)
+        assert ind["avg_volume"] == pytest.approx(df["Volume"].rolling(20).mean().iloc[-1], rel=1e-13)
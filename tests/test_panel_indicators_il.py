@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("yfinance")
+
+import screener_il
+from panel_indicators_il import compute_panel_indicators, rolling_mean
+
+
+def _frames(seed: int, k: int = 40) -> dict:
+    rng = np.random.default_rng(seed)
+    out = {}
+    for j in range(k):
+        n   = int(rng.integers(30, 520))
+        idx = pd.bdate_range(end="2026-10-15", periods=n)
+        close = np.round(np.maximum(20 + np.cumsum(rng.normal(0, 0.3, n)), 1), 2)
+        out[f"T{j}.TA"] = pd.DataFrame({"Close": close,
+                                        "Volume": rng.integers(1_000, 900_000, n).astype(float)},
+                                       index=idx)
+    return out
+
+
+def _screener_values(df: pd.DataFrame) -> dict:
+    close = df["Close"]
+    exp = {"rsi": screener_il._rsi(close), "trend_4w": screener_il._trend_pct(close)}
+    exp["bb_pct"], exp["bb_upper"], exp["bb_lower"] = screener_il._bb(close)
+    exp["macd_line"], exp["macd_signal"], exp["macd_hist"] = screener_il._macd(close)
+    exp["volume_ratio"], exp["volume_spike"] = screener_il._volume_spike(df["Volume"])
+    exp["avg_volume"] = float(df["Volume"].rolling(20).mean().iloc[-1])
+    for w in (20, 50, 120, 200):
+        exp[f"ma{w}"] = round(float(close.rolling(w).mean().iloc[-1]), 2) if len(close) >= w else None
+    return exp
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_panel_matches_screener(seed):
+    frames = _frames(seed)
+    panel  = compute_panel_indicators(frames)
+    for t, df in frames.items():
+        for key, want in _screener_values(df).items():
+            got = panel.loc[t, key]
+            if want is None:
+                assert np.isnan(got), (t, key)
+            else:
+                assert got == want, (t, key, want, got)
+
+
+def test_rolling_mean_is_pandas_bit_for_bit():
+    rng = np.random.default_rng(1)
+    c = np.round(20 + np.cumsum(rng.normal(0, 0.3, 400)), 2)
+    c[[7, 150, 151]] = np.nan
+    c[200:240] = c[200]                                  # flat run
+    x = np.concatenate([np.full(30, np.nan), c])[:, None]   # bottom-aligned padding
+    for w in (1, 20, 50, 200):
+        want = pd.Series(c).rolling(w).mean().to_numpy()
+        assert np.array_equal(rolling_mean(x, w)[30:, 0], want, equal_nan=True), w
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("yfinance")
+
+from backtester_il import SignalPanel, simulate_trades
+from portfolio_sim_il import simulate_portfolio
+
+
+PARAMS = dict(rsi_period=14, rsi_max=45, bb_period=20, bb_std=2.0)
+
+
+def _frame(index, seed):
+    rng = np.random.default_rng(seed)
+    t = np.arange(len(index))
+    close = 50 * np.exp(0.002 * t + 0.06 * np.sin(t / 6 + seed) + rng.normal(0, 0.005, len(t)))
+    return pd.DataFrame({"Close": close}, index=index)
+
+
+def _entries_before(result, panel, row):
+    trades = result["trades"]
+    if trades.empty:
+        return 0
+    dates = pd.to_datetime(trades["entry_date"], format="%Y-%m-%d")
+    return int((dates < panel.index[row].tz_localize(None)).sum())
+
+
+def test_ticker_listed_mid_window_does_not_block_entries():
+    index  = pd.bdate_range("2022-01-03", periods=500)
+    frames = {f"T{i}.TA": _frame(index, i) for i in range(8)}
+    base   = SignalPanel(frames)
+
+    late = dict(frames)
+    late["NEW.TA"] = _frame(index, 99).iloc[-100:]            # listed 100 bars before the end
+    panel = SignalPanel(late)
+    listed = panel.row_of(index[-100])
+
+    ref = simulate_portfolio(base, PARAMS, first=200)
+    res = simulate_portfolio(panel, PARAMS, first=200)
+
+    before = _entries_before(ref, base, listed)
+    assert before > 0
+    assert _entries_before(res, panel, listed) == before
+    assert not res["equity"].isna().any()
+
+
+class _FixedSignals:
+    """Minimal panel with hand-set buy / sell matrices."""
+
+    def __init__(self, close, buy, sell):
+        self.tickers = ["A.TA"]
+        self.index   = pd.bdate_range("2026-01-05", periods=len(close))
+        self.close   = np.asarray(close, dtype=float)[:, None]
+        self.valid   = ~np.isnan(self.close)
+        self._buy    = np.asarray(buy)[:, None]
+        self._sell   = np.asarray(sell)[:, None]
+
+    def signals(self, params):
+        return self._buy, self._sell
+
+    def rsi(self, period):
+        return np.zeros_like(self.close)
+
+
+def test_no_reentry_on_the_exit_bar():
+    # buy rule still true on the (winning, so no cooldown) exit bar — e.g. rsi_max > 65
+    close = [10, 11, 12, 13, 14, 15]
+    buy   = [True] * 6
+    sell  = [False, False, True, False, False, False]
+    panel = _FixedSignals(close, buy, sell)
+
+    res = simulate_portfolio(panel, PARAMS, max_positions=1, fee_pct=0.0)
+    entries = list(res["trades"]["entry_date"])
+    assert entries == ["2026-01-05", "2026-01-08"]
+
+    bt = simulate_trades(panel.close, panel._buy, panel._sell)
+    assert [panel.index[e].strftime("%Y-%m-%d") for _, e, _ in bt] == entries
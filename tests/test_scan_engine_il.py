@@ -0,0 +1,36 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("yfinance")
+
+import data_store_il
+import scan_engine_il
+
+
+def _bars(price: float, volume: float) -> pd.DataFrame:
+    idx = pd.bdate_range(end="2026-10-15", periods=30)
+    return pd.DataFrame({"Open": price, "High": price, "Low": price, "Close": price,
+                         "Volume": volume}, index=idx).astype(float)
+
+
+def test_prefilter_rechecks_stale_rejections(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_store_il, "OHLCV_DIR", str(tmp_path))
+    params = {"min_price": 5, "min_volume": 50_000}
+    for t in ("OLD.TA", "NEW.TA"):
+        data_store_il._write(t, _bars(1.0, 1_000))            # fails both bounds
+    stale = time.time() - 3 * 86400
+    os.utime(data_store_il._path("OLD.TA"), (stale, stale))
+
+    asked = []
+    def fake_quotes(tickers, **kw):
+        asked.extend(tickers)
+        return {t: _bars(20.0, 500_000) for t in tickers}   # recovered since
+    monkeypatch.setattr(scan_engine_il, "fetch_quotes", fake_quotes)
+
+    survivors, stats = scan_engine_il.prefilter_il(["OLD.TA", "NEW.TA", "NONE.TA"], params)
+    assert asked == ["OLD.TA", "NONE.TA"]
+    assert survivors == ["OLD.TA", "NONE.TA"]
+    assert stats["from_store"] == 1 and stats["from_quotes"] == 2
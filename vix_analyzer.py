@@ -5,10 +5,13 @@ Answers: "When VIX spiked above threshold in the past,
           which stocks went UP and which went DOWN?"
 
 Logic:
-- Download 2 years of daily VIX data
-- Detect every period where VIX crossed above `threshold`
+- Download 3 years of daily VIX data once per US trading session (kept in memory)
+- Detect every period where VIX crossed above `threshold` — windows for every
+  threshold in the slider range come out of one run-length pass and are cached
 - For each spike event: measure stock returns during the spike window
   (from day VIX crossed threshold → until VIX fell back below threshold)
+  Window bounds are resolved once with searchsorted on the shared trading-day index
+  and all windows × tickers come out of one gather over an aligned close panel
 - Aggregate across all events: avg return per stock during spikes
 - Classify: consistent risers (safe havens) vs consistent fallers (risky)
 """
@@ -17,147 +20,276 @@ import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from data_store_il import get_ohlcv, as_index_ts
+
 
 # ──────────────────────────────────────────────────────────────
 #  STEP 1: Find all VIX spike windows
+#  (VIX history cached per US trading session; windows for every
+#   slider threshold precomputed in one run-length pass)
 # ──────────────────────────────────────────────────────────────
-def get_vix_spike_windows(threshold: float = 25.0, lookback_days: int = 730) -> list:
-    """
-    Download VIX history and find all windows where VIX > threshold.
+VIX_HISTORY_DAYS = 1095          # widest lookback offered in the VIX tab
+VIX_THRESHOLDS   = range(18, 51) # slider range in the VIX tab
 
-    Returns list of (start_date, end_date, peak_vix) tuples.
-    Each window = consecutive trading days with VIX above threshold.
+_VIX_HISTORY = {}                # session date → (covered from, VIX close series)
+_VIX_WINDOWS = {}                # (session date, lookback) → {threshold: windows}
+_VIX_LOCK    = threading.Lock()
+
+
+def _session_date():
+    return pd.Timestamp.now(tz="America/New_York").date()
+
+
+def get_vix_history(lookback_days: int = 730) -> pd.Series:
     """
+    VIX closes for the last `lookback_days` — downloaded once per session date
+    (VIX_HISTORY_DAYS, or more if asked) and sliced from memory afterwards.
+    """
+    day   = _session_date()
     end   = datetime.today()
     start = end - timedelta(days=lookback_days)
+    with _VIX_LOCK:
+        covers, close = _VIX_HISTORY.get(day, (None, None))
+    if close is None or start < covers:
+        fetch_from = min(start, end - timedelta(days=VIX_HISTORY_DAYS))
+        try:
+            df = yf.Ticker("^VIX").history(start=fetch_from, end=end, interval="1d")
+            close = df['Close'].dropna() if not df.empty else pd.Series(dtype=float)
+        except Exception:
+            return pd.Series(dtype=float)
+        if close.empty:
+            return close
+        with _VIX_LOCK:
+            _VIX_HISTORY.clear()                          # older sessions are stale
+            _VIX_HISTORY[day] = (fetch_from, close)
+    return close.iloc[close.index.searchsorted(as_index_ts(start, close.index), side='left'):]
+
+
+def spike_windows_all(close: pd.Series, thresholds) -> dict:
+    """
+    {threshold: windows} for every threshold, from one (days × thresholds) pass.
 
-    try:
-        vix = yf.Ticker("^VIX")
-        df  = vix.history(start=start, end=end, interval="1d")
-        if df.empty:
-            return []
-
-        close = df['Close'].dropna()
-        above = close > threshold
-
+    A window starts on the first close above the threshold and ends on the first
+    close back at/below it (or the last bar if the spike is still on); peak_vix is
+    the highest close in [start, end].
+    """
+    thresholds = list(thresholds)
+    if close.empty or not thresholds:
+        return {th: [] for th in thresholds}
+    vals  = close.to_numpy(dtype=float)
+    dates = close.index
+    above = vals[:, None] > np.asarray(thresholds, dtype=float)[None, :]
+    prev  = np.vstack([np.zeros((1, len(thresholds)), dtype=bool), above[:-1]])
+    rises = above & ~prev                                  # run starts
+    falls = ~above & prev                                  # first bar back below
+
+    out = {}
+    for j, th in enumerate(thresholds):
+        starts = np.flatnonzero(rises[:, j])
+        ends   = np.flatnonzero(falls[:, j])
+        if len(ends) < len(starts):
+            ends = np.append(ends, len(vals) - 1)          # ongoing spike at end of data
         windows = []
-        in_spike   = False
-        spike_start = None
-
-        for date, is_above in above.items():
-            if is_above and not in_spike:
-                in_spike    = True
-                spike_start = date
-            elif not is_above and in_spike:
-                in_spike = False
-                peak_vix = float(close.loc[spike_start:date].max())
-                windows.append({
-                    "start":    spike_start,
-                    "end":      date,
-                    "peak_vix": round(peak_vix, 2),
-                    "days":     (date - spike_start).days,
-                })
-
-        # Handle ongoing spike at end of data
-        if in_spike and spike_start is not None:
-            peak_vix = float(close.loc[spike_start:].max())
+        for s, e in zip(starts, ends):
             windows.append({
-                "start":    spike_start,
-                "end":      close.index[-1],
-                "peak_vix": round(peak_vix, 2),
-                "days":     (close.index[-1] - spike_start).days,
+                "start":    dates[s],
+                "end":      dates[e],
+                "peak_vix": round(float(vals[s:e + 1].max()), 2),
+                "days":     (dates[e] - dates[s]).days,
             })
+        out[th] = windows
+    return out
+
+
+def get_spike_table(lookback_days: int = 730) -> dict:
+    """{threshold: windows} for every VIX_THRESHOLDS value — cached per session date."""
+    key = (_session_date(), lookback_days)
+    with _VIX_LOCK:
+        table = _VIX_WINDOWS.get(key)
+    if table is None:
+        close = get_vix_history(lookback_days)
+        table = spike_windows_all(close, VIX_THRESHOLDS)
+        if not close.empty:
+            with _VIX_LOCK:
+                for k in [k for k in _VIX_WINDOWS if k[0] != key[0]]:
+                    del _VIX_WINDOWS[k]
+                _VIX_WINDOWS[key] = table
+    return table
 
-        return windows
 
-    except Exception as e:
+def get_vix_spike_windows(threshold: float = 25.0, lookback_days: int = 730) -> list:
+    """
+    Find all windows where VIX > threshold.
+
+    Returns list of {start, end, peak_vix, days} dicts.
+    Each window = consecutive trading days with VIX above threshold.
+    """
+    try:
+        table = get_spike_table(lookback_days)
+        if threshold in table:
+            return list(table[threshold])
+        return spike_windows_all(get_vix_history(lookback_days), [threshold])[threshold]
+    except Exception:
         return []
 
 
 # ──────────────────────────────────────────────────────────────
-#  STEP 2: Measure stock return during each VIX window
+#  STEP 2: Measure stock returns during the VIX windows
+#  (all windows × all tickers as one gather over an aligned panel)
 # ──────────────────────────────────────────────────────────────
-def _measure_stock_during_spikes(ticker: str, windows: list,
-                                  lookback_days: int = 730) -> dict:
+def _close_panel(frames: dict) -> tuple:
+    """{ticker: frame} → (tickers, union trading-day index, close matrix NaN where no bar)."""
+    closes = {}
+    for t, df in frames.items():
+        if df is None or df.empty or 'Close' not in df.columns:
+            continue
+        c = df['Close'].dropna()
+        if len(c) >= 10:
+            closes[t] = c
+    if not closes:
+        return [], pd.DatetimeIndex([]), np.empty((0, 0))
+    tickers = list(closes)
+    index   = pd.DatetimeIndex(sorted(set().union(*[c.index for c in closes.values()])))
+    mat     = np.full((len(index), len(tickers)), np.nan)
+    for j, t in enumerate(tickers):
+        mat[index.get_indexer(closes[t].index), j] = closes[t].to_numpy(dtype=float)
+    return tickers, index, mat
+
+
+def _valid_neighbours(valid: np.ndarray) -> tuple:
     """
-    For a single ticker, measure its % return during each VIX spike window.
-    Returns dict with aggregated stats across all spike events.
+    next_ok[r, j] = first row ≥ r where ticker j has a bar (n if none)
+    prev_ok[r, j] = last  row ≤ r where ticker j has a bar (-1 if none)
     """
-    try:
-        end   = datetime.today()
-        start = end - timedelta(days=lookback_days + 30)
-
-        t  = yf.Ticker(ticker)
-        df = t.history(start=start, end=end, interval="1d", auto_adjust=True)
-        if df is None or df.empty or 'Close' not in df.columns:
-            return {}
-        if isinstance(df.columns, pd.MultiIndex):
-            df.columns = df.columns.get_level_values(0)
-
-        close = df['Close'].dropna()
-        if len(close) < 10:
-            return {}
+    n    = len(valid)
+    rows = np.arange(n)[:, None]
+    prev_ok = np.maximum.accumulate(np.where(valid, rows, -1), axis=0)
+    next_ok = np.minimum.accumulate(np.where(valid, rows, n)[::-1], axis=0)[::-1]
+    return next_ok, prev_ok
 
-        event_returns = []
 
-        for w in windows:
-            w_start = pd.Timestamp(w['start'])
-            w_end   = pd.Timestamp(w['end'])
-
-            # Find closest available trading days
-            available = close.index
-            starts_after  = available[available >= w_start]
-            ends_before   = available[available <= w_end]
-
-            if len(starts_after) == 0 or len(ends_before) == 0:
-                continue
+def _window_rows(index: pd.DatetimeIndex, valid: np.ndarray, windows: list) -> tuple:
+    """
+    Panel rows of every window × ticker: first bar on/after the window start and
+    last bar on/before the window end (same rule as the old per-window masks).
+    Returns (ps, pe, ok) — (windows × tickers); ok = both bars exist and pe > ps.
+    """
+    n      = len(index)
+    starts = np.array([index.searchsorted(as_index_ts(w['start'], index), side='left')  for w in windows])
+    ends   = np.array([index.searchsorted(as_index_ts(w['end'],   index), side='right') - 1 for w in windows])
 
-            p_start = starts_after[0]
-            p_end   = ends_before[-1]
+    next_ok, prev_ok = _valid_neighbours(valid)
+    ps = next_ok[np.minimum(starts, n - 1)]                  # (windows × tickers) row gathers
+    ps[starts >= n] = n
+    pe = prev_ok[np.maximum(ends, 0)]
+    pe[ends < 0] = -1
+    ok = (ps < n) & (pe >= 0) & (pe > ps)
+    return np.where(ok, ps, 0), np.where(ok, pe, 0), ok
 
-            if p_end <= p_start:
-                continue
 
-            price_start = float(close.loc[p_start])
-            price_end   = float(close.loc[p_end])
+def spike_return_matrix(index: pd.DatetimeIndex, close: np.ndarray, windows: list) -> tuple:
+    """
+    % return of every ticker over every window.
+    Returns (returns, ok) — both (windows × tickers); ok marks usable events.
+    """
+    if not windows or close.size == 0:
+        k = close.shape[1] if close.ndim == 2 else 0
+        return np.empty((0, k)), np.zeros((0, k), dtype=bool)
+    ps, pe, ok = _window_rows(index, ~np.isnan(close), windows)
+    cols = np.arange(close.shape[1])
+    p0   = close[ps, cols]
+    p1   = close[pe, cols]
+    ok  &= p0 > 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ret = (p1 - p0) / p0 * 100
+    return ret, ok
+
+
+def _spike_stats(ticker: str, windows: list, ret: np.ndarray, ok: np.ndarray) -> dict:
+    """Aggregate one ticker's column of the return matrix."""
+    event_returns = [{
+        "spike_start": pd.Timestamp(w['start']).strftime('%Y-%m-%d'),
+        "spike_end":   pd.Timestamp(w['end']).strftime('%Y-%m-%d'),
+        "peak_vix":    w['peak_vix'],
+        "return_pct":  round(float(r), 2),
+        "went_up":     bool(r > 0),
+    } for w, r, k in zip(windows, ret, ok) if k]
+
+    if not event_returns:
+        return {}
 
-            if price_start <= 0:
-                continue
+    returns   = [e['return_pct'] for e in event_returns]
+    went_up   = sum(1 for e in event_returns if e['went_up'])
+    pct_up    = went_up / len(event_returns) * 100
 
-            ret = (price_end - price_start) / price_start * 100
-            event_returns.append({
-                "spike_start": w_start.strftime('%Y-%m-%d'),
-                "spike_end":   w_end.strftime('%Y-%m-%d'),
-                "peak_vix":    w['peak_vix'],
-                "return_pct":  round(ret, 2),
-                "went_up":     ret > 0,
-            })
+    return {
+        "ticker":          ticker,
+        "ticker_short":    ticker.replace('.TA', ''),
+        "num_events":      len(event_returns),
+        "pct_rose":        round(pct_up, 1),
+        "pct_fell":        round(100 - pct_up, 1),
+        "avg_return":      round(float(np.mean(returns)), 2),
+        "median_return":   round(float(np.median(returns)), 2),
+        "best_event":      round(float(max(returns)), 2),
+        "worst_event":     round(float(min(returns)), 2),
+        "consistent_up":   pct_up >= 60,    # rose in ≥60% of spikes
+        "consistent_down": pct_up <= 40,    # fell in ≥60% of spikes
+        "events":          event_returns,
+    }
 
-        if not event_returns:
-            return {}
 
-        returns   = [e['return_pct'] for e in event_returns]
-        went_up   = sum(1 for e in event_returns if e['went_up'])
-        went_down = len(event_returns) - went_up
-        pct_up    = went_up / len(event_returns) * 100
+def measure_spikes(frames: dict, windows: list) -> list:
+    """Spike stats for every ticker in `frames` ({ticker: OHLCV frame}), input order."""
+    tickers, index, close = _close_panel(frames)
+    if not tickers:
+        return []
+    ret, ok = spike_return_matrix(index, close, windows)
+    out = []
+    for j, t in enumerate(tickers):
+        res = _spike_stats(t, windows, ret[:, j], ok[:, j])
+        if res:
+            out.append(res)
+    return out
+
+
+def _load_frames(tickers: list, lookback_days: int, session=None,
+                 progress_bar=None, status_text=None) -> dict:
+    """Price history per ticker — from the session's memory, else the local store."""
+    start = datetime.today() - timedelta(days=lookback_days + 30)
+
+    def load(t):
+        try:
+            return t, (session.get(t, start=start) if session is not None
+                       else get_ohlcv(t, start=start))
+        except Exception:
+            return t, None
+
+    frames, done, total = {}, 0, len(tickers)
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        futures = [ex.submit(load, t) for t in tickers]
+        for fut in as_completed(futures):
+            t, df = fut.result()
+            frames[t] = df
+            done += 1
+            if progress_bar:
+                progress_bar.progress(done / total)
+            if status_text:
+                status_text.caption(f"Loading {done}/{total} stocks…")
+    return {t: frames[t] for t in tickers}
 
-        return {
-            "ticker":          ticker,
-            "ticker_short":    ticker.replace('.TA', ''),
-            "num_events":      len(event_returns),
-            "pct_rose":        round(pct_up, 1),
-            "pct_fell":        round(100 - pct_up, 1),
-            "avg_return":      round(float(np.mean(returns)), 2),
-            "median_return":   round(float(np.median(returns)), 2),
-            "best_event":      round(float(max(returns)), 2),
-            "worst_event":     round(float(min(returns)), 2),
-            "consistent_up":   pct_up >= 60,    # rose in ≥60% of spikes
-            "consistent_down": pct_up <= 40,    # fell in ≥60% of spikes
-            "events":          event_returns,
-        }
 
+def _measure_stock_during_spikes(ticker: str, windows: list,
+                                  lookback_days: int = 730, session=None) -> dict:
+    """
+    For a single ticker, measure its % return during each VIX spike window.
+    Returns dict with aggregated stats across all spike events.
+    """
+    try:
+        res = measure_spikes(_load_frames([ticker], lookback_days, session), windows)
+        return res[0] if res else {}
     except Exception:
         return {}
 
@@ -171,6 +303,7 @@ def run_vix_spike_analysis(
     lookback_days: int  = 730,
     progress_bar  = None,
     status_text   = None,
+    session       = None,
 ) -> dict:
     """
     Full pipeline:
@@ -178,6 +311,8 @@ def run_vix_spike_analysis(
     2. For each ticker, measure behavior during those windows
     3. Return structured results
 
+    `session` (DataSession) reuses price history already loaded by the scan.
+
     Returns:
     {
         "threshold":   float,
@@ -199,22 +334,12 @@ def run_vix_spike_analysis(
             "windows":   [],
         }
 
-    # ── Analyze each ticker ───────────────────────────────────
-    results   = []
-    done, total = 0, len(tickers)
-
-    with ThreadPoolExecutor(max_workers=8) as ex:
-        futures = {ex.submit(_measure_stock_during_spikes, t, windows, lookback_days): t
-                   for t in tickers}
-        for fut in as_completed(futures):
-            done += 1
-            if progress_bar:
-                progress_bar.progress(done / total)
-            if status_text:
-                status_text.caption(f"Analyzing {done}/{total} stocks…")
-            res = fut.result()
-            if res and res.get('num_events', 0) > 0:
-                results.append(res)
+    # ── Analyze all tickers at once ───────────────────────────
+    frames = _load_frames(tickers, lookback_days, session, progress_bar, status_text)
+    try:
+        results = measure_spikes(frames, windows)
+    except Exception:
+        results = []
 
     if not results:
         return {
@@ -257,3 +382,93 @@ def run_vix_spike_analysis(
         "all_stocks": results,
         "summary":    summary,
     }
+
+
+# ──────────────────────────────────────────────────────────────
+#  STEP 4: Threshold-sensitivity surface (all thresholds at once)
+# ──────────────────────────────────────────────────────────────
+def threshold_surface(frames: dict, table: dict) -> dict:
+    """
+    Per-ticker spike stats for every threshold in `table` ({threshold: windows}).
+
+    All windows of all thresholds are stacked into one list and resolved with a
+    single gather over the aligned panel; each event's return is the difference
+    of cumulative log returns (log closes) between its two bars, so an extra
+    threshold only adds rows to that gather. Per-threshold aggregates are
+    segment sums over the stacked rows.
+
+    Returns {"thresholds", "tickers", "avg_return", "pct_rose", "num_events"} —
+    the last three are DataFrames (thresholds × tickers), NaN where a ticker had
+    no event at that threshold.
+    """
+    thresholds = sorted(table)
+    tickers, index, close = _close_panel(frames)
+    empty = pd.DataFrame(index=pd.Index(thresholds, name="threshold"), columns=tickers, dtype=float)
+    out   = {"thresholds": thresholds, "tickers": tickers,
+             "avg_return": empty, "pct_rose": empty.copy(), "num_events": empty.copy()}
+    windows = [w for th in thresholds for w in table[th]]
+    if not tickers or not windows:
+        return out
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        log_c = np.where(close > 0, np.log(close), np.nan)
+    ps, pe, ok = _window_rows(index, ~np.isnan(log_c), windows)
+    cols = np.arange(len(tickers))
+    ret  = np.expm1(log_c[pe, cols] - log_c[ps, cols]) * 100
+    ret  = np.where(ok, ret, 0.0)
+
+    sizes  = np.array([len(table[th]) for th in thresholds])
+    has    = sizes > 0
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])[has]
+    count  = np.zeros((len(thresholds), len(tickers)))
+    total  = np.zeros_like(count)
+    rose   = np.zeros_like(count)
+    count[has] = np.add.reduceat(ok.astype(float), starts, axis=0)
+    total[has] = np.add.reduceat(ret, starts, axis=0)
+    rose[has]  = np.add.reduceat((ok & (ret > 0)).astype(float), starts, axis=0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg = np.where(count > 0, total / count, np.nan)
+        pct = np.where(count > 0, rose / count * 100, np.nan)
+    frame = lambda m: pd.DataFrame(m, index=empty.index, columns=tickers)
+    out.update(avg_return=frame(avg).round(2), pct_rose=frame(pct).round(1),
+               num_events=frame(np.where(count > 0, count, np.nan)))
+    return out
+
+
+def rank_surface(surface: dict, min_events: int = 2) -> pd.DataFrame:
+    """
+    One row per ticker across all thresholds (cells with < min_events ignored):
+    mean avg return, mean % rose, thresholds covered and the return at the highest
+    covered threshold — sorted best first.
+    """
+    avg = surface["avg_return"].where(surface["num_events"] >= min_events)
+    pct = surface["pct_rose"].where(surface["num_events"] >= min_events)
+    if avg.empty:
+        return pd.DataFrame()
+    top = avg.apply(lambda c: c.dropna().iloc[-1] if c.notna().any() else np.nan)
+    df  = pd.DataFrame({
+        "ticker":       avg.columns,
+        "avg_return":   avg.mean().round(2).to_numpy(),
+        "pct_rose":     pct.mean().round(1).to_numpy(),
+        "thresholds":   avg.notna().sum().to_numpy(),
+        "top_return":   top.to_numpy(),
+    }).dropna(subset=["avg_return"])
+    return df.sort_values("avg_return", ascending=False).reset_index(drop=True)
+
+
+def run_vix_threshold_surface(tickers: list, lookback_days: int = 730,
+                              progress_bar=None, status_text=None, session=None) -> dict:
+    """
+    threshold_surface() for the universe over every VIX_THRESHOLDS value, using the
+    cached spike table and one price load per ticker.
+    """
+    table = get_spike_table(lookback_days)
+    if not any(table.values()):
+        return {"error": f"No VIX data for the last {lookback_days//365} years"}
+    frames = _load_frames(tickers, lookback_days, session, progress_bar, status_text)
+    try:
+        return threshold_surface(frames, table)
+    except Exception as e:
+        return {"error": f"Surface failed: {e}"}
+
@@ -0,0 +1,122 @@
+"""
+walk_forward_il.py — Walk-forward optimization for the TASE backtester
+אופטימיזציה מתגלגלת — בחירת פרמטרים על תקופת אימון ובדיקה מחוץ למדגם
+
+Logic:
+- Load the long history once into a SignalPanel (backtester_il)
+- Buy/sell matrices are computed once per parameter combination over the whole
+  history — folds only slice rows, nothing is recomputed per fold
+- Rolling folds: train on `train_days`, test on the next `test_days`, step by `test_days`
+- Each train fold picks the combination with the best `metric` (min trades required);
+  that combination is then evaluated on the test fold only (out of sample)
+- Trades open at the end of a fold are valued at the fold's last bar
+"""
+
+import itertools
+from datetime import timedelta
+import pandas as pd
+
+from backtester_il import load_signal_panel, simulate_trades, trade_returns, _trade_stats
+
+
+WF_HISTORY_DAYS = 365 * 5        # calendar days loaded per ticker
+WF_TRAIN_DAYS   = 365
+WF_TEST_DAYS    = 91             # one quarter out of sample per fold
+WF_MIN_TRADES   = 10             # train folds with fewer trades can't win the pick
+WARMUP_BARS     = 200            # MA200 needs this many bars before the first fold
+
+
+def _folds(index: pd.DatetimeIndex, start_row: int, train_days: int, test_days: int) -> list:
+    """[(train_first, train_last, test_first, test_last)] row bounds (last = exclusive)."""
+    folds = []
+    if len(index) <= start_row:
+        return folds
+    t0 = index[start_row]
+    while True:
+        train_end = t0 + timedelta(days=train_days)
+        test_end  = train_end + timedelta(days=test_days)
+        a = int(index.searchsorted(t0))
+        b = int(index.searchsorted(train_end))
+        c = int(index.searchsorted(test_end))
+        if b >= len(index) or c <= b:
+            break
+        folds.append((a, b, b, c))
+        if c >= len(index):
+            break
+        t0 += timedelta(days=test_days)
+    return folds
+
+
+def _fold_stats(panel, buy, sell, first, last) -> tuple:
+    sl   = slice(first, last)
+    sim  = simulate_trades(panel.close[sl], buy[sl], sell[sl], panel.valid[sl])
+    rets = trade_returns(panel, sim, first, last)
+    return _trade_stats(rets), rets
+
+
+def run_walk_forward_il(tickers: list, grid: dict, base_params: dict = None,
+                        session=None, history_days: int = WF_HISTORY_DAYS,
+                        train_days: int = WF_TRAIN_DAYS, test_days: int = WF_TEST_DAYS,
+                        metric: str = "avg_return", min_trades: int = WF_MIN_TRADES,
+                        progress_cb=None) -> dict:
+    """
+    Walk-forward run of every combination in `grid` (same format as
+    run_backtest_sweep_il).
+
+    Returns:
+      folds   — DataFrame, one row per fold: dates, chosen parameters,
+                train_<stat> and test_<stat> columns
+      overall — stats of all out-of-sample trades together
+      params  — the combination chosen on the most recent train fold
+    """
+    base   = dict(base_params or {})
+    keys   = list(grid)
+    combos = [{**base, **dict(zip(keys, vals))} for vals in itertools.product(*grid.values())]
+    empty  = {"folds": pd.DataFrame(), "overall": _trade_stats([]), "params": None}
+    if not combos:
+        return empty
+
+    panel = load_signal_panel(tickers, days=history_days, session=session)
+    folds = _folds(panel.index, min(WARMUP_BARS, len(panel.index)), train_days, test_days)
+    if not folds:
+        return empty
+
+    signals = [panel.signals(c) for c in combos]           # once per combination
+
+    rows, oos, chosen = [], [], None
+    for k, (a, b, c, d) in enumerate(folds):
+        best, best_i, best_train = None, None, None
+        for i, (buy, sell) in enumerate(signals):
+            stats, _ = _fold_stats(panel, buy, sell, a, b)
+            if stats["total_trades"] < min_trades:
+                continue
+            if best is None or stats[metric] > best:
+                best, best_i, best_train = stats[metric], i, stats
+        if best_i is None:
+            if progress_cb:
+                progress_cb(k + 1, len(folds))
+            continue
+
+        test, rets = _fold_stats(panel, *signals[best_i], c, d)
+        oos.extend(rets)
+        chosen = combos[best_i]
+        rows.append({
+            "fold":        k + 1,
+            "train_start": panel.index[a].date(),
+            "train_end":   panel.index[b - 1].date(),
+            "test_start":  panel.index[c].date(),
+            "test_end":    panel.index[d - 1].date(),
+            **{key: combos[best_i][key] for key in keys},
+            **{f"train_{s}": v for s, v in best_train.items()},
+            **{f"test_{s}": v for s, v in test.items()},
+        })
+        if progress_cb:
+            progress_cb(k + 1, len(folds))
+
+    if not rows:
+        return empty
+    return {
+        "folds":   pd.DataFrame(rows),
+        "overall": _trade_stats(oos),
+        "params":  chosen,
+    }